@@ -12,6 +12,7 @@ brew "git"
 brew "mailhog", restart_service: true
 brew "pipenv"
 brew "postgresql", restart_service: true
+brew "qpdf"
 brew "redis", restart_service: true
 brew "watchman"
 brew "getsentry/tools/sentry-cli"
@@ -1,9 +1,28 @@
 import pytest
+from app.caches import clear_local
 from app.factories import IssueFactory
 from app.factories import UserFactory
+from app.resolvers import _resolvers
+from django.core.cache import cache
 from django.test.client import Client
 
 
+@pytest.fixture(autouse=True)
+def caches(settings):
+    # cache.clear() is FLUSHDB, so point the cache at its own database first
+    settings.CACHES = {
+        'default': {
+            **settings.CACHES['default'],
+            'LOCATION': settings.TEST_REDIS_URL,
+        },
+    }
+    cache.clear()
+    clear_local()
+    # Versions restart with the flush, so memos from other tests would match
+    _resolvers.clear()
+    return
+
+
 @pytest.fixture
 def anon_client():
     client = Client()
@@ -5,6 +5,10 @@ from django.contrib import admin
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.admin import UserAdmin as UserAdminBase
 from django.contrib.gis.admin.options import GISModelAdmin
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import format_html
+from django.utils.html import format_html_join
 from django_fsm_log.admin import StateLogInline
 from fsm_admin.mixins import FSMTransitionMixin
 from reversion.admin import VersionAdmin
@@ -21,12 +25,15 @@ from .inlines import StudentInline
 from .models import Account
 from .models import Comment
 from .models import Event
+from .models import Geocode
 from .models import Isat
 from .models import Issue
+from .models import Outbox
 from .models import School
 from .models import Staff
 from .models import User
 from .models import Zone
+from .tasks import queue_packets
 
 
 def approve(modeladmin, request, queryset):
@@ -35,6 +42,23 @@ def approve(modeladmin, request, queryset):
         comment.save()
 approve.short_description = 'Approve Comment'
 
+def retry(modeladmin, request, queryset):
+    queryset.update(
+        state=Outbox.STATE.pending,
+        next_attempt=timezone.now(),
+    )
+retry.short_description = 'Retry Email'
+
+def build_packets(modeladmin, request, queryset):
+    for issue in queryset:
+        links = format_html_join(
+            ', ',
+            '<a href="{}">{}</a>',
+            ((reverse('packet', args=[job.id]), job.id) for job in queue_packets(issue)),
+        )
+        modeladmin.message_user(request, format_html('{}: packets queued ({})', issue, links))
+build_packets.short_description = 'Build Board Packets'
+
 
 @admin.register(Account)
 class AccountAdmin(VersionAdmin, GISModelAdmin):
@@ -54,6 +78,7 @@ class AccountAdmin(VersionAdmin, GISModelAdmin):
         'is_public',
         'is_spouse',
         'zone',
+        'zoned_schools',
         'user',
         # 'notes',
     ]
@@ -100,6 +125,7 @@ class AccountAdmin(VersionAdmin, GISModelAdmin):
     # }
     readonly_fields = [
         # 'place',
+        'zoned_schools',
     ]
 
 
@@ -207,6 +233,32 @@ class EventAdmin(VersionAdmin):
     ]
 
 
+@admin.register(Geocode)
+class GeocodeAdmin(admin.ModelAdmin):
+    save_on_top = True
+    fields = [
+        'address',
+        'key',
+        'response',
+    ]
+    list_display = [
+        'address',
+        'updated',
+    ]
+    list_filter = [
+        'updated',
+    ]
+    search_fields = [
+        'address',
+    ]
+    readonly_fields = [
+        'key',
+    ]
+    ordering = [
+        '-updated',
+    ]
+
+
 @admin.register(Isat)
 class IsatAdmin(VersionAdmin):
     save_on_top = True
@@ -265,6 +317,8 @@ class IssueAdmin(VersionAdmin):
         'description',
         'recipient_name',
         'recipient_emails',
+        'delivery',
+        'is_letter_attached',
     ]
     list_display = [
         'name',
@@ -283,6 +337,55 @@ class IssueAdmin(VersionAdmin):
     ]
     autocomplete_fields = [
     ]
+    actions = [
+        build_packets,
+    ]
+
+
+@admin.register(Outbox)
+class OutboxAdmin(admin.ModelAdmin):
+    save_on_top = True
+    fields = [
+        'key',
+        'state',
+        'attempts',
+        'next_attempt',
+        'sent',
+        'from_email',
+        'to',
+        'cc',
+        'subject',
+        'body',
+    ]
+    list_display = [
+        'key',
+        'state',
+        'attempts',
+        'sent',
+    ]
+    list_filter = [
+        'state',
+        'template',
+    ]
+    search_fields = [
+        'key',
+    ]
+    readonly_fields = [
+        'key',
+        'attempts',
+        'sent',
+        'from_email',
+        'to',
+        'cc',
+        'subject',
+        'body',
+    ]
+    ordering = [
+        '-created',
+    ]
+    actions = [
+        retry,
+    ]
 
 
 @admin.register(School)
@@ -302,6 +405,7 @@ class SchoolAdmin(VersionAdmin, GISModelAdmin):
         'school_id',
         'point',
         'boundary',
+        'boundary_simple',
         'address_raw',
         'phone_raw',
         'zone',
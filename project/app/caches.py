@@ -0,0 +1,210 @@
+import gzip
+import hashlib
+import json
+import logging
+import time
+
+import brotli
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.db.models import Q
+
+log = logging.getLogger(__name__)
+
+_local = {}
+
+
+# Versions
+def get_version(name):
+    key = f'{name}_version'
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key, 1)
+    return version
+
+def bump_version(name):
+    key = f'{name}_version'
+    if not cache.add(key, 2, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 2, timeout=None)
+    return
+
+
+# Issues
+def get_active_issue():
+    from .models import Issue
+    now = time.monotonic()
+    # One small read keeps every process's memo in step with clear_active_issue
+    version = get_version('active_issue')
+    expires, cached, issue = _local.get('active_issue', (0, None, None))
+    if expires > now and cached == version:
+        return issue
+    # Keyed on the version read first, so a row read before a save commits
+    # can only land under a version clear_active_issue has already retired
+    key = f'active_issue_{version}'
+    payload = cache.get(key)
+    if payload is None:
+        issue = Issue.objects.filter(
+            state=Issue.STATE.active,
+        ).first()
+        payload = {
+            'issue': issue,
+        }
+        cache.set(key, payload, timeout=settings.ACTIVE_ISSUE_CACHE_TIMEOUT)
+    _local['active_issue'] = (now + settings.ACTIVE_ISSUE_TIMEOUT, version, payload['issue'])
+    return payload['issue']
+
+def clear_active_issue():
+    _local.pop('active_issue', None)
+    bump_version('active_issue')
+    return
+
+
+# Metrics
+def count_metrics():
+    from .models import Account
+    from .models import Comment
+    from .models import Student
+    accounts = Account.objects.aggregate(
+        total=Count('id'),
+        spouses=Count('id', filter=Q(is_spouse=True)),
+    )
+    return {
+        'member_count': accounts['total'] + accounts['spouses'],
+        'comment_count': Comment.objects.count(),
+        'student_count': Student.objects.count(),
+    }
+
+def reconcile_metrics():
+    counts = count_metrics()
+    cached = cache.get_many(counts.keys())
+    for key, value in counts.items():
+        if cached.get(key) != value:
+            log.info(f'{key} drift: {cached.get(key)} -> {value}')
+    cache.set_many(counts, timeout=None)
+    return counts
+
+def incr_metric(key, delta=1):
+    if not delta:
+        return
+    def apply():
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            # Counter missing from Redis; rebuild from the committed rows
+            reconcile_metrics()
+    transaction.on_commit(apply)
+    return
+
+def get_metrics():
+    now = time.monotonic()
+    expires, metrics = _local.get('metrics', (0, None))
+    if expires > now:
+        return metrics
+    counts = cache.get_many([
+        'member_count',
+        'comment_count',
+        'student_count',
+    ])
+    metrics = {
+        'members': counts.get('member_count'),
+        'comments': counts.get('comment_count'),
+        'students': counts.get('student_count'),
+    }
+    _local['metrics'] = (now + settings.METRICS_TIMEOUT, metrics)
+    return metrics
+
+def clear_local():
+    _local.clear()
+    return
+
+
+# Boundaries
+def build_boundaries(kind, level='high'):
+    from .exporters import LEVELS
+    from .exporters import export_schools
+    from .models import School
+    schools = School.objects.filter(
+        is_traditional=True,
+        kind=getattr(School.KIND, kind),
+    ).exclude(
+        boundary=None,
+    )
+    collection = export_schools(schools, **LEVELS[level])
+    content = json.dumps(collection, separators=(',', ':')).encode()
+    return {
+        'etag': hashlib.sha256(content).hexdigest()[:32],
+        'identity': content,
+        'gzip': gzip.compress(content),
+        'br': brotli.compress(content),
+    }
+
+def get_boundaries(kind, level='high'):
+    version = get_version('boundaries')
+    key = f'boundaries_{version}_{kind}_{level}'
+    payload = cache.get(key)
+    if payload is None:
+        payload = build_boundaries(kind, level)
+        cache.set(key, payload, timeout=settings.BOUNDARIES_TIMEOUT)
+    return payload
+
+
+# Density
+def build_density():
+    from .models import Density
+    densities = Density.objects.select_related(
+        'zone',
+        'school',
+    )
+    payload = {
+        'zones': [],
+        'schools': [],
+        'cells': {
+            'type': 'FeatureCollection',
+            'features': [],
+        },
+    }
+    for density in densities:
+        counts = {
+            'accounts': density.accounts,
+            'spouses': density.spouses,
+            'students': density.students,
+        }
+        if density.kind == Density.KIND.zone:
+            payload['zones'].append({
+                'id': str(density.zone.id),
+                'name': density.zone.name,
+                'num': density.zone.num,
+                **counts,
+            })
+        elif density.kind == Density.KIND.school:
+            payload['schools'].append({
+                'id': str(density.school.id),
+                'name': density.school.name,
+                'kind': density.school.get_kind_display(),
+                **counts,
+            })
+        else:
+            payload['cells']['features'].append({
+                'type': 'Feature',
+                'geometry': {
+                    'type': 'Point',
+                    'coordinates': density.point.coords,
+                },
+                'properties': counts,
+            })
+    return payload
+
+def get_density():
+    version = get_version('density')
+    key = f'density_{version}'
+    payload = cache.get(key)
+    if payload is None:
+        payload = build_density()
+        cache.set(key, payload, timeout=settings.DENSITY_TIMEOUT)
+    return payload
@@ -1,4 +1,6 @@
-from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+from .caches import get_metrics
 
 
 def avatar(request):
@@ -13,14 +15,7 @@ def avatar(request):
     }
 
 def metrics(request):
-    member_count = cache.get('member_count')
-    comment_count = cache.get('comment_count')
-    student_count = cache.get('student_count')
-    metrics = {
-        'METRICS' : {
-            'members': member_count,
-            'comments': comment_count,
-            'students': student_count,
-        }
+    # Only hits Redis if the template actually renders METRICS
+    return {
+        'METRICS': SimpleLazyObject(get_metrics),
     }
-    return metrics
@@ -1,12 +1,53 @@
-import json
-
 from app.models import School
 
+# Coordinate precision and geometry per map zoom level
+LEVELS = {
+    'low': {
+        'precision': 4,
+        'simple': True,
+    },
+    'medium': {
+        'precision': 5,
+        'simple': True,
+    },
+    'high': {
+        'precision': None,
+        'simple': False,
+    },
+}
+
+def get_level(zoom):
+    try:
+        zoom = int(zoom)
+    except (TypeError, ValueError):
+        return 'high'
+    if zoom < 12:
+        return 'low'
+    if zoom < 15:
+        return 'medium'
+    return 'high'
 
-def export_school(school):
-    boundary = json.loads(school.boundary.json)
-    percentage = round(school.capacity, 2) * 100
-    string_capacity = f" {percentage}% Capacity"
+def round_coordinates(coordinates, precision):
+    if isinstance(coordinates[0], (int, float)):
+        return [round(x, precision) for x in coordinates]
+    return [round_coordinates(x, precision) for x in coordinates]
+
+def export_school(school, precision=None, simple=False):
+    geometry = school.boundary
+    if simple and school.boundary_simple:
+        geometry = school.boundary_simple
+    coordinates = geometry.coords
+    if precision is not None:
+        coordinates = round_coordinates(coordinates, precision)
+    boundary = {
+        'type': geometry.geom_type,
+        'coordinates': coordinates,
+    }
+    if school.capacity is None:
+        string_capacity = ''
+    else:
+        percentage = round(school.capacity, 2) * 100
+        string_capacity = f" {percentage}% Capacity"
     feature = {
         'type': 'Feature',
         'properties': {
@@ -18,10 +59,12 @@ def export_school(school):
     }
     return feature
 
-def export_schools(schools):
+def export_schools(schools, precision=None, simple=False):
     features = []
     for school in schools:
-        feature = export_school(school)
+        if not school.boundary:
+            continue
+        feature = export_school(school, precision, simple)
         features.append(feature)
     collection = {
         'type': 'FeatureCollection',
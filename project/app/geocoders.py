@@ -0,0 +1,114 @@
+import datetime
+import hashlib
+import json
+import threading
+import time
+
+import geocoder
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Geocode
+
+
+def normalize_address(address):
+    return " ".join(address.upper().replace(',', ' ').replace('.', ' ').split())
+
+def get_key(address):
+    return hashlib.sha256(normalize_address(address).encode()).hexdigest()
+
+
+def is_success(response):
+    return response is not None and response.get('status') == 'OK'
+
+
+class GoogleGeocoder:
+    def geocode(self, address):
+        # OVER_QUERY_LIMIT, REQUEST_DENIED and ZERO_RESULTS are not answers
+        result = geocoder.google(address)
+        if not result.ok or result.status != 'OK':
+            return None
+        return result.json
+
+
+class FileGeocoder:
+    """
+    Stand-in that answers from a JSON file of address -> response.
+    """
+    def __init__(self, filename=None):
+        with open(filename or settings.GEOCODER_FILE) as f:
+            responses = json.load(f)
+        self.responses = {
+            normalize_address(address): response for address, response in responses.items()
+        }
+
+    def geocode(self, address):
+        return self.responses.get(normalize_address(address))
+
+
+def get_geocoder():
+    return import_string(settings.GEOCODER_BACKEND)()
+
+class RateLimiter:
+    """
+    Spaces calls evenly at no more than `rate` per second across threads.
+    """
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self.lock = threading.Lock()
+        self.next = time.monotonic()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next - now
+            self.next = max(now, self.next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+        return
+
+
+def get_cached_geocodes(keys):
+    cutoff = timezone.now() - datetime.timedelta(seconds=settings.GEOCODE_CACHE_TTL)
+    return dict(Geocode.objects.filter(
+        key__in=keys,
+        updated__gte=cutoff,
+        response__status='OK',
+    ).values_list(
+        'key',
+        'response',
+    ))
+
+def get_cached_geocode(address):
+    key = get_key(address)
+    return get_cached_geocodes([key]).get(key)
+
+def geocode_address(address, backend=None):
+    response = get_cached_geocode(address)
+    if response is not None:
+        return response
+    response = (backend or get_geocoder()).geocode(address)
+    if not is_success(response):
+        return None
+    Geocode.objects.update_or_create(
+        key=get_key(address),
+        defaults={
+            'address': address,
+            'response': response,
+        },
+    )
+    return response
+
+def purge_geocodes(address=None, days=None):
+    geocodes = Geocode.objects.all()
+    if address:
+        geocodes = geocodes.filter(
+            key=get_key(address),
+        )
+    if days is not None:
+        geocodes = geocodes.filter(
+            updated__lt=timezone.now() - datetime.timedelta(days=days),
+        )
+    count, _ = geocodes.delete()
+    return count
@@ -1,12 +1,16 @@
 # Django
 import csv
-import json
+import itertools
 
-from app.forms import IsatForm
+from app.caches import bump_version
 from app.models import Isat
 from app.models import School
 from app.models import Staff
-from django.contrib.gis.geos import GEOSGeometry
+from django.conf import settings
+from django.contrib.gis.gdal import DataSource
+from django.contrib.gis.geos import MultiPolygon
+from django.core.exceptions import ValidationError
+from django.db import transaction
 
 
 def clean_stat(stat):
@@ -32,151 +36,376 @@ def clean_note(stat):
             return 'NSIZE'
         return ''
 
-def import_isat(filename, year):
+SUBJECTS = {
+    'ELA': 10,
+    'Math': 20,
+    'Science': 30,
+}
+
+GRADES = {
+    'All Grades': 1,
+    'Grade 3': 3,
+    'Grade 4': 4,
+    'Grade 5': 5,
+    'Grade 6': 6,
+    'Grade 7': 7,
+    'Grade 8': 8,
+    'High School': 10,
+}
+
+def read_rows(filename, header=True):
     with open(filename) as f:
         reader = csv.reader(
             f,
             skipinitialspace=True,
         )
-        next(reader)
-        rows = [row for row in reader]
-        for row in rows:
-            subject_reduce = {
-                'ELA': 10,
-                'Math': 20,
-                'Science': 30,
-            }
-            grade_reduce = {
-                'All Grades': 1,
-                'Grade 3': 3,
-                'Grade 4': 4,
-                'Grade 5': 5,
-                'Grade 6': 6,
-                'Grade 7': 7,
-                'Grade 8': 8,
-                'High School': 10,
-            }
-            if row[1] == 'JOINT SCHOOL DISTRICT NO. 2' and row[6].strip() == 'All Students':
-                school_id = int(row[2])
+        if header:
+            next(reader)
+        yield from reader
+
+def chunked(rows, size=1000):
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, size)):
+        yield batch
+
+def index_schools(field):
+    # Ambiguous keys map to None so callers skip rather than guess
+    index = {}
+    for school in School.objects.exclude(**{field: None}):
+        key = getattr(school, field)
+        index[key] = None if key in index else school
+    return index
+
+def apply_changes(model, created, changed, fields, deleted=(), batch_size=1000):
+    with transaction.atomic():
+        model.objects.filter(
+            pk__in=list(deleted),
+        ).delete()
+        model.objects.bulk_create(
+            created,
+            batch_size=batch_size,
+        )
+        model.objects.bulk_update(
+            changed,
+            fields=fields,
+            batch_size=batch_size,
+        )
+    return
+
+ISAT_FIELDS = [
+    'advanced',
+    'proficient',
+    'basic',
+    'below',
+    'advanced_note',
+    'proficient_note',
+    'basic_note',
+    'below_note',
+]
+
+def validate_isat(isat):
+    # Field-level checks the old IsatForm ran, without its per-row FK query
+    isat.clean_fields(exclude=[
+        'school',
+    ])
+    for field in ISAT_FIELDS[:4]:
+        value = getattr(isat, field)
+        if value is not None and not 0 <= value <= 100:
+            raise ValidationError({field: f'{value} is not a percentage'})
+    return
+
+def import_isat(filename, year, dry_run=False, batch_size=1000):
+    schools = index_schools('school_id')
+    existing = {
+        (school, subject, grade): tuple(values)
+        for school, subject, grade, *values in Isat.objects.filter(
+            year=year,
+        ).values_list(
+            'school',
+            'subject',
+            'grade',
+            *ISAT_FIELDS,
+        )
+    }
+    counts = {
+        'inserted': 0,
+        'updated': 0,
+        'unchanged': 0,
+        'invalid': 0,
+        'skipped': 0,
+    }
+    rows = (
+        row for row in read_rows(filename)
+        if row[1] == 'JOINT SCHOOL DISTRICT NO. 2' and row[6].strip() == 'All Students'
+    )
+    with transaction.atomic():
+        for batch in chunked(rows, batch_size):
+            isats = {}
+            for row in batch:
                 try:
-                    school = School.objects.get(
-                        school_id=school_id,
-                    )
-                except School.DoesNotExist:
+                    school = schools[int(row[2])]
+                    subject = SUBJECTS[row[4]]
+                    grade = GRADES[row[5]]
+                except (KeyError, ValueError):
+                    school = None
+                if school is None:
+                    counts['skipped'] += 1
                     continue
-                data = {
-                    'subject': subject_reduce[row[4]],
-                    'grade': grade_reduce[row[5]],
-                    'advanced': clean_stat(row[7]),
-                    'proficient': clean_stat(row[8]),
-                    'basic': clean_stat(row[9]),
-                    'below': clean_stat(row[10]),
-                    'advanced_note': clean_note(row[7]),
-                    'proficient_note': clean_note(row[8]),
-                    'basic_note': clean_note(row[9]),
-                    'below_note': clean_note(row[10]),
-                    'year': year,
-                    'school': school,
-                }
-                form = IsatForm(data=data)
-                if form.is_valid():
-                    form.save()
-                else:
+                isat = Isat(
+                    school=school,
+                    subject=subject,
+                    grade=grade,
+                    year=year,
+                    advanced=clean_stat(row[7]),
+                    proficient=clean_stat(row[8]),
+                    basic=clean_stat(row[9]),
+                    below=clean_stat(row[10]),
+                    advanced_note=clean_note(row[7]) or '',
+                    proficient_note=clean_note(row[8]) or '',
+                    basic_note=clean_note(row[9]) or '',
+                    below_note=clean_note(row[10]) or '',
+                )
+                try:
+                    validate_isat(isat)
+                except ValidationError:
+                    counts['invalid'] += 1
                     continue
-    return
+                isats[(school.pk, subject, grade)] = isat
+            writes = []
+            for key, isat in isats.items():
+                values = tuple(getattr(isat, field) for field in ISAT_FIELDS)
+                stored = existing.get(key)
+                if stored == values:
+                    counts['unchanged'] += 1
+                    continue
+                counts['updated' if stored else 'inserted'] += 1
+                existing[key] = values
+                writes.append(isat)
+            if dry_run or not writes:
+                continue
+            Isat.objects.bulk_create(
+                writes,
+                update_conflicts=True,
+                unique_fields=[
+                    'school',
+                    'subject',
+                    'grade',
+                    'year',
+                ],
+                update_fields=ISAT_FIELDS + [
+                    'updated',
+                ],
+            )
+    return counts
 
 
-def import_staff(filename):
-    with open(filename) as f:
-        reader = csv.reader(
-            f,
-            skipinitialspace=True,
-        )
-        rows = [row for row in reader]
-        for row in rows:
+def import_staff(filename, dry_run=False):
+    """
+    Sync Staff to a district roster CSV, keyed on (name, school).
+
+    The file must be the full roster: any Staff row missing from it,
+    including ones entered by hand in the admin, is deleted, as are
+    duplicates left by earlier reloads.  Run with dry_run first to see
+    the counts.
+    """
+    schools = index_schools('location_id')
+    existing = {}
+    deleted = set()
+    for staff in Staff.objects.order_by('created'):
+        key = (staff.name, staff.school_raw)
+        if key in existing:
+            # Duplicates left by earlier full reloads; keep the oldest
+            deleted.add(staff.pk)
+        else:
+            existing[key] = staff
+    seen = set()
+    created = {}
+    changed = {}
+    counts = {
+        'inserted': 0,
+        'updated': 0,
+        'unchanged': 0,
+        'deleted': 0,
+        'skipped': 0,
+    }
+    for row in read_rows(filename, header=False):
+        try:
             name = str(row[0]).strip()
             position = str(row[2]).strip()
             school_raw = str(row[1]).strip()
             location_id = int(row[3])
-            try:
-                school = School.objects.get(
-                    location_id=location_id,
-                )
-            except School.DoesNotExist:
-                school = None
-
-            staff = Staff(
+        except (IndexError, ValueError):
+            counts['skipped'] += 1
+            continue
+        school = schools.get(location_id)
+        key = (name, school_raw)
+        seen.add(key)
+        staff = existing.get(key)
+        if staff is None:
+            created[key] = Staff(
                 name=name,
                 position=position,
                 school_raw=school_raw,
                 school=school,
             )
-            staff.save()
-    return
+            continue
+        if staff.position == position and staff.school_id == getattr(school, 'pk', None):
+            counts['unchanged'] += 1
+            continue
+        staff.position = position
+        staff.school = school
+        changed[key] = staff
+    # Staff no longer on the roster
+    deleted.update(
+        staff.pk for key, staff in existing.items() if key not in seen
+    )
+    counts['inserted'] = len(created)
+    counts['updated'] = len(changed)
+    counts['deleted'] = len(deleted)
+    if not dry_run:
+        apply_changes(
+            Staff,
+            created.values(),
+            changed.values(),
+            fields=[
+                'position',
+                'school',
+            ],
+            deleted=deleted,
+        )
+    return counts
 
 
 def import_locations(filename):
-    with open(filename) as f:
-        reader = csv.reader(
-            f,
-            skipinitialspace=True,
-        )
-        next(reader)
-        rows = [row for row in reader]
-        for row in rows:
-            location_id = int(row[0])
-            name = str(row[1]).strip()
-            try:
-                school = School.objects.get(
-                    location_id=location_id,
-                )
-            except School.DoesNotExist:
-                print(name)
-            except School.MultipleObjectsReturned:
-                print('Multi', name)
+    schools = index_schools('location_id')
+    for row in read_rows(filename):
+        location_id = int(row[0])
+        name = str(row[1]).strip()
+        if location_id not in schools:
+            print(name)
+        elif schools[location_id] is None:
+            print('Multi', name)
     return
 
 
-def import_enrollment(filename):
-    with open(filename) as f:
-        reader = csv.reader(
-            f,
-            skipinitialspace=True,
-        )
-        next(reader)
-        rows = [row for row in reader]
-        miss = []
-        for row in rows:
+def import_enrollment(filename, dry_run=False):
+    by_full = index_schools('full')
+    by_location = index_schools('location_id')
+    changed = {}
+    counts = {
+        'updated': 0,
+        'unchanged': 0,
+        'skipped': 0,
+    }
+    for row in read_rows(filename):
+        try:
             name = str(row[0]).strip()
             enrollment = int(row[1])
             capacity = int(row[2])
+        except (IndexError, ValueError):
+            counts['skipped'] += 1
+            continue
+        school = by_full.get(name)
+        if school is None:
             try:
-                school = School.objects.get(
-                    full=name,
-                )
-            except School.DoesNotExist:
-                location_id = int(row[4])
-                school = School.objects.get(
-                    location_id=location_id,
-                )
-            except School.MultipleObjectsReturned:
-                print('Multi', name)
-            school.enrollment = enrollment
-            school.capacity = capacity
-            school.save()
-    return
+                school = by_location.get(int(row[4]))
+            except (IndexError, ValueError):
+                school = None
+        if school is None:
+            counts['skipped'] += 1
+            continue
+        if school.enrollment == enrollment and school.capacity == capacity:
+            counts['unchanged'] += 1
+            continue
+        school.enrollment = enrollment
+        school.capacity = capacity
+        changed[school.pk] = school
+    counts['updated'] = len(changed)
+    if not dry_run:
+        apply_changes(
+            School,
+            [],
+            changed.values(),
+            fields=[
+                'enrollment',
+                'capacity',
+            ],
+        )
+        bump_version('boundaries')
+    return counts
 
 
-def import_boundary_file(filename):
-    with open(filename) as f:
-        geojson = json.loads(f.read())
-        for feature in geojson['features']:
-            school = School.objects.get(name=feature['properties']['Name'])
-            geometry = feature['geometry']
-            if geometry['type'] == 'Polygon':
-                geometry['type'] = 'MultiPolygon'
-                geometry['coordinates'] = [geometry['coordinates']]
-            geom = GEOSGeometry(str(feature['geometry']))
-            school.boundary = geom
-            school.save()
-    return
+def to_multipolygon(geom):
+    if geom.geom_type == 'MultiPolygon':
+        return geom
+    if geom.geom_type == 'Polygon':
+        return MultiPolygon(geom, srid=geom.srid)
+    polygons = []
+    for part in geom:
+        if part.geom_type == 'Polygon':
+            polygons.append(part)
+        elif part.geom_type == 'MultiPolygon':
+            polygons.extend(part)
+    if not polygons:
+        return None
+    return MultiPolygon(*polygons, srid=geom.srid)
+
+def clean_boundary(geom):
+    if not geom.valid:
+        geom = geom.make_valid()
+    return to_multipolygon(geom)
+
+def simplify_boundary(geom, tolerance):
+    simple = geom.simplify(
+        tolerance,
+        preserve_topology=True,
+    )
+    return to_multipolygon(simple)
+
+def read_features(filename):
+    # OGR parses the file itself, streaming large GeoJSON documents
+    layer = DataSource(filename)[0]
+    for feature in layer:
+        yield feature.get('Name'), feature.geom.geos
+
+def import_boundary_file(filename, tolerance=None, dry_run=False):
+    if tolerance is None:
+        tolerance = settings.BOUNDARY_SIMPLIFY_TOLERANCE
+    schools = index_schools('name')
+    changed = {}
+    counts = {
+        'updated': 0,
+        'repaired': 0,
+        'skipped': 0,
+    }
+    for name, geom in read_features(filename):
+        school = schools.get(name)
+        if school is None:
+            counts['skipped'] += 1
+            continue
+        boundary = clean_boundary(geom)
+        if boundary is None:
+            counts['skipped'] += 1
+            continue
+        if not geom.valid:
+            counts['repaired'] += 1
+        school.boundary = boundary
+        if tolerance:
+            school.boundary_simple = simplify_boundary(boundary, tolerance)
+        changed[school.pk] = school
+    counts['updated'] = len(changed)
+    if not dry_run:
+        apply_changes(
+            School,
+            [],
+            changed.values(),
+            fields=[
+                'boundary',
+                'boundary_simple',
+            ],
+        )
+        bump_version('boundaries')
+        # Bulk updates skip school_post_save, so queue the re-tag here
+        from app.tasks import queue_zoned_schools
+        queue_zoned_schools()
+    return counts
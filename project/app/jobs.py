@@ -0,0 +1,116 @@
+import datetime
+import functools
+from collections import namedtuple
+
+import django_rq
+from django.apps import apps
+from django.core.cache import cache
+from django.db.models import Model
+from django.utils.module_loading import import_string
+
+# What each model's jobs read, fetched in the same query on rehydration
+RELATED = {
+    'app.account': ['user', 'zone'],
+    'app.comment': ['account__user', 'account__zone', 'issue'],
+    'app.user': ['account'],
+}
+
+
+class ModelRef(namedtuple('ModelRef', ['label', 'pk'])):
+    """
+    A (model label, pk) stand-in for a model instance in job arguments.
+    """
+    __slots__ = ()
+
+    def load(self):
+        model = apps.get_model(self.label)
+        return model.objects.select_related(
+            *RELATED.get(self.label, []),
+        ).get(pk=self.pk)
+
+
+def dump(value):
+    if isinstance(value, Model):
+        return ModelRef(value._meta.label_lower, str(value.pk))
+    return value
+
+def load(value):
+    if isinstance(value, ModelRef):
+        return value.load()
+    return value
+
+def job(func_or_queue, *args, **kwargs):
+    """
+    django_rq's job decorator, with model instances passed by reference.
+
+    .delay() swaps model instances in the arguments for ModelRefs, and the
+    worker fetches fresh rows before calling the task, so Redis never
+    holds pickled instances and tasks never act on stale snapshots.
+    Calling the task directly still accepts instances.
+    """
+    if callable(func_or_queue):
+        return job('default')(func_or_queue)
+
+    def decorator(func):
+        @functools.wraps(func)
+        def task(*targs, **tkwargs):
+            return func(
+                *[load(arg) for arg in targs],
+                **{key: load(value) for key, value in tkwargs.items()},
+            )
+        task = django_rq.job(func_or_queue, *args, **kwargs)(task)
+        delay = task.delay
+
+        @functools.wraps(delay)
+        def delay_refs(*targs, **tkwargs):
+            return delay(
+                *[dump(arg) for arg in targs],
+                **{key: dump(value) for key, value in tkwargs.items()},
+            )
+        task.delay = delay_refs
+        return task
+    return decorator
+
+
+# Coalescing
+COUNTS = [
+    'skipped',
+    'coalesced',
+    'enqueued',
+    'executed',
+]
+
+def incr_count(name, kind):
+    key = f'{kind}_{name}'
+    if not cache.add(key, 1, timeout=None):
+        cache.incr(key)
+    return
+
+def get_counts(name):
+    counts = cache.get_many([f'{kind}_{name}' for kind in COUNTS])
+    return {kind: counts.get(f'{kind}_{name}', 0) for kind in COUNTS}
+
+def run_coalesced(name, *args):
+    incr_count(name, 'executed')
+    return import_string(name)(*args)
+
+def coalesce(task, instance, delay):
+    """
+    Enqueue task for instance at most once per delay seconds.
+
+    The first call in a window claims a Redis key and schedules the task
+    delay seconds out; later calls in the window are dropped, since the
+    scheduled run reads the row fresh and picks up their changes.  With
+    instance None the task takes no arguments and coalesces globally.
+    """
+    name = f'{task.__module__}.{task.__name__}'
+    refs = [] if instance is None else [dump(instance)]
+    key = ''.join([f'coalesce_{name}', *(f'_{ref.label}_{ref.pk}' for ref in refs)])
+    if not cache.add(key, 1, timeout=delay):
+        incr_count(name, 'coalesced')
+        return None
+    incr_count(name, 'enqueued')
+    queue = django_rq.get_queue('default')
+    if not queue.is_async:
+        return queue.enqueue(run_coalesced, name, *refs)
+    return queue.enqueue_in(datetime.timedelta(seconds=delay), run_coalesced, name, *refs)
@@ -0,0 +1,241 @@
+import functools
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from xml.etree import ElementTree
+
+import pydf
+from cloudinary_storage.storage import RawMediaCloudinaryStorage
+from django.conf import settings
+from django.template.loader import get_template
+from django.template.loader import render_to_string
+
+from .importers import chunked
+
+LETTER_OPTIONS = {
+    'enable_smart_shrinking': False,
+    'orientation': 'Portrait',
+    'margin_top': '10mm',
+    'margin_bottom': '10mm',
+    'margin_right': '20mm',
+    'margin_left': '20mm',
+}
+
+
+# Cache
+@functools.lru_cache
+def get_template_version():
+    source = get_template('pdfs/letter.html').template.source
+    return hashlib.sha256(source.encode()).hexdigest()
+
+def get_letter_key(comment):
+    # Everything the letter template reads; any change means a new page
+    inputs = [
+        str(comment.id),
+        comment.content,
+        comment.card,
+        comment.created.isoformat(),
+        get_template_version(),
+    ]
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+def get_letter_path(comment):
+    return os.path.join(settings.LETTERS_CACHE_DIR, f'{get_letter_key(comment)}.pdf')
+
+def render_letter(comment):
+    return render_to_string('pdfs/letter.html', {'comment': comment})
+
+def build_letter(comment, path):
+    pdf = pydf.generate_pdf(render_letter(comment), **LETTER_OPTIONS)
+    os.makedirs(settings.LETTERS_CACHE_DIR, exist_ok=True)
+    # Write beside the target and rename so readers never see half a file
+    fd, tmp = tempfile.mkstemp(dir=settings.LETTERS_CACHE_DIR, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(pdf)
+    os.replace(tmp, path)
+    return path
+
+def build_letters(misses, html):
+    """
+    Build the cached letters for misses, (comment, path) pairs, in one go.
+
+    html, the letters concatenated, goes through a single wkhtmltopdf
+    process, so the stylesheets the template links are fetched once per
+    chunk rather than once per letter.  The outline wkhtmltopdf dumps
+    gives the page each letter's heading lands on, and qpdf cuts those
+    page ranges into the per-letter cache files.  Falls back to one
+    process per letter if the outline doesn't line up with misses.
+    """
+    os.makedirs(settings.LETTERS_CACHE_DIR, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=settings.LETTERS_CACHE_DIR) as tmp:
+        chunk = os.path.join(tmp, 'chunk.pdf')
+        outline = os.path.join(tmp, 'outline.xml')
+        with open(chunk, 'wb') as f:
+            f.write(pydf.generate_pdf(html, dump_outline=outline, **LETTER_OPTIONS))
+        starts = get_letter_starts(outline)
+        if len(starts) != len(misses) or starts != sorted(set(starts)):
+            for comment, path in misses:
+                build_letter(comment, path)
+            return
+        ends = [start - 1 for start in starts[1:]] + [get_page_count(chunk)]
+        for (comment, path), start, end in zip(misses, starts, ends):
+            letter = os.path.join(tmp, 'letter.pdf')
+            run_qpdf(tmp, ['--empty', '--pages', chunk, f'{start}-{end}', '--', letter])
+            os.replace(letter, path)
+    return
+
+def get_letter_starts(outline):
+    # Each letter opens with the template's only top-level heading
+    try:
+        document = ElementTree.parse(outline).getroot()[0]
+    except (ElementTree.ParseError, FileNotFoundError, IndexError):
+        return []
+    pages = [int(item.get('page')) for item in document]
+    return [page - pages[0] + 1 for page in pages] if pages else []
+
+def get_page_count(path):
+    result = subprocess.run(
+        ['qpdf', '--show-npages', path],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return int(result.stdout)
+
+def touch_letter(path):
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+def evict_letters(limit=None):
+    """
+    Delete the least recently used letters until the cache fits in limit bytes.
+    """
+    limit = settings.LETTERS_CACHE_SIZE if limit is None else limit
+    try:
+        entries = []
+        for entry in os.scandir(settings.LETTERS_CACHE_DIR):
+            if entry.name.endswith('.pdf'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+    except FileNotFoundError:
+        return 0
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    evicted = 0
+    for _, size, path in entries:
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        evicted += 1
+    return evicted
+
+
+# Letters
+def get_letter(comment):
+    """
+    Return the path of the cached letter PDF for comment, building it on a miss.
+    """
+    path = get_letter_path(comment)
+    if not touch_letter(path):
+        build_letter(comment, path)
+        evict_letters()
+    return path
+
+def merge_letters(comments, output, chunk_size=None, workers=None, progress=None):
+    """
+    Write the letters for comments into a single PDF at output.
+
+    Cached letters are reused.  Comments are taken chunk_size at a time,
+    and the misses in each chunk are built by one wkhtmltopdf process;
+    at most two chunks per worker are in flight.  Finished letters are
+    linked into a spool directory so eviction can't remove them
+    mid-packet, then qpdf concatenates the spool on disk; Python only
+    ever holds their paths.  output may be a path or a binary file.
+    progress, if given, is called with the count spooled.
+    """
+    chunk_size = chunk_size or settings.LETTERS_CHUNK_SIZE
+    workers = workers or settings.LETTERS_WORKERS or os.cpu_count()
+    os.makedirs(settings.LETTERS_CACHE_DIR, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=settings.LETTERS_CACHE_DIR) as spool:
+        paths = []
+        pending = deque()
+        # wkhtmltopdf runs out of process, so threads keep every core busy
+        with ThreadPoolExecutor(workers) as executor:
+            for chunk in chunked(comments, chunk_size):
+                entries = [(comment, get_letter_path(comment)) for comment in chunk]
+                misses = [(comment, path) for comment, path in entries if not touch_letter(path)]
+                future = None
+                if misses:
+                    # Render here so worker threads never touch the database
+                    html = ''.join(render_letter(comment) for comment, _ in misses)
+                    future = executor.submit(build_letters, misses, html)
+                pending.append((entries, future))
+                while len(pending) > workers * 2:
+                    spool_letters(spool, paths, *pending.popleft(), progress)
+            while pending:
+                spool_letters(spool, paths, *pending.popleft(), progress)
+        if isinstance(output, (str, os.PathLike)):
+            concat_letters(spool, paths, output)
+        else:
+            packet = concat_letters(spool, paths, os.path.join(spool, 'packet.pdf'))
+            with open(packet, 'rb') as f:
+                shutil.copyfileobj(f, output)
+    evict_letters()
+    return output
+
+def spool_letters(spool, paths, entries, future, progress=None):
+    if future:
+        future.result()
+    for comment, path in entries:
+        paths.append(spool_letter(spool, len(paths), comment, path))
+        if progress:
+            progress(len(paths))
+    return
+
+def spool_letter(spool, num, comment, path):
+    target = os.path.join(spool, f'{num:06d}.pdf')
+    try:
+        os.link(path, target)
+    except FileNotFoundError:
+        # Evicted by another process since it was touched
+        build_letter(comment, target)
+    except OSError:
+        shutil.copyfile(path, target)
+    return target
+
+def concat_letters(spool, paths, output):
+    """
+    Concatenate the PDFs at paths into output with qpdf.
+
+    qpdf copies page content from the input files as it writes rather
+    than loading whole documents, and the paths go in an argument file
+    so packets of any length fit on the command line.
+    """
+    args = ['--empty', '--pages', *paths, '--', output] if paths else ['--empty', output]
+    run_qpdf(spool, args)
+    return output
+
+def run_qpdf(tmp, args):
+    # Arguments go in a file, one per line, so any number of paths fit
+    argfile = os.path.join(tmp, 'args')
+    with open(argfile, 'w') as f:
+        f.write('\n'.join(str(arg) for arg in args))
+    subprocess.run(['qpdf', f'@{argfile}'], check=True, capture_output=True)
+    return
+
+
+# Packets
+def get_packet_storage():
+    return RawMediaCloudinaryStorage()
@@ -0,0 +1,157 @@
+import datetime
+import hashlib
+import logging
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .importers import chunked
+from .models import Outbox
+
+log = logging.getLogger(__name__)
+
+
+def deliver(emails, retries=None):
+    """
+    Send emails over one reused connection, retrying the ones that fail.
+
+    Each attempt opens a single connection for everything still pending;
+    messages that raise are retried on a fresh connection with backoff.
+    Returns the (sent, failed) emails.
+    """
+    retries = settings.MAILER_RETRIES if retries is None else retries
+    sent = []
+    pending = list(emails)
+    for attempt in range(retries + 1):
+        if not pending:
+            break
+        if attempt:
+            time.sleep(settings.MAILER_BACKOFF * 2 ** (attempt - 1))
+        sending, pending = pending, []
+        done = set()
+        try:
+            with get_connection() as connection:
+                for email in sending:
+                    try:
+                        connection.send_messages([email])
+                    except Exception as err:
+                        log.warning(f'{email.to}: {err}')
+                        continue
+                    sent.append(email)
+                    done.add(id(email))
+        except Exception as err:
+            # Opening or closing the connection failed
+            log.warning(f'Connection error: {err}')
+        pending = [email for email in sending if id(email) not in done]
+    for email in pending:
+        log.error(f'{email.to}: gave up after {retries + 1} attempts')
+    return sent, pending
+
+def send_bulk(emails, batch_size=None):
+    """
+    Send a stream of emails batch by batch.
+
+    `emails` may be a generator, so messages are only rendered one batch
+    at a time.  Logs throughput per batch and returns the totals.
+    """
+    totals = Counter()
+    batches = chunked(emails, batch_size or settings.MAILER_BATCH_SIZE)
+    for num, batch in enumerate(batches, 1):
+        start = time.monotonic()
+        sent, failed = deliver(batch)
+        elapsed = time.monotonic() - start
+        rate = len(sent) / elapsed if elapsed else len(sent)
+        log.info(f'Batch {num}: {len(sent)} sent, {len(failed)} failed in {elapsed:.1f}s ({rate:.1f}/s)')
+        totals.update({
+            'batches': 1,
+            'sent': len(sent),
+            'failed': len(failed),
+        })
+        totals['seconds'] += elapsed
+    return {
+        'batches': totals['batches'],
+        'sent': totals['sent'],
+        'failed': totals['failed'],
+        'seconds': round(totals['seconds'], 1),
+    }
+
+
+# Outbox
+def get_outbox_key(instance, recipient, template):
+    if instance.pk is None:
+        raise ValueError(f'{template}: save {instance._meta.label} before queueing its email')
+    # Hashed like Geocode.key, so long templates and addresses always fit
+    key = f'{template}:{instance.pk}:{recipient}'
+    return hashlib.sha256(key.encode()).hexdigest()
+
+def queue_email(instance, recipient, template, subject, from_email, to, cc=[], context=None):
+    """
+    Render an email into the outbox unless its key is already there.
+
+    The key identifies the (template, instance, recipient) so a retried
+    caller can't queue the same message twice, which only holds once the
+    instance is saved.  Returns the row and whether it was created.
+    """
+    return Outbox.objects.get_or_create(
+        key=get_outbox_key(instance, recipient, template),
+        defaults={
+            'template': template,
+            'subject': subject,
+            'from_email': from_email,
+            'to': to,
+            'cc': cc,
+            'body': render_to_string(template, context),
+        },
+    )
+
+def dispatch_outbox(batch_size=None):
+    """
+    Claim and send one batch of due outbox rows.
+
+    Rows are locked with SKIP LOCKED for the length of the transaction,
+    so several workers can drain the outbox without sending a row twice;
+    a worker that dies releases its rows on rollback.  Failures back off
+    exponentially until OUTBOX_MAX_ATTEMPTS.
+    """
+    batch_size = batch_size or settings.MAILER_BATCH_SIZE
+    with transaction.atomic():
+        rows = list(Outbox.objects.select_for_update(
+            skip_locked=True,
+        ).filter(
+            state=Outbox.STATE.pending,
+            next_attempt__lte=timezone.now(),
+        ).order_by(
+            'next_attempt',
+        )[:batch_size])
+        if not rows:
+            return Counter()
+        emails = {id(row): row.build() for row in rows}
+        sent, failed = deliver(emails.values(), retries=0)
+        sent = {id(email) for email in sent}
+        now = timezone.now()
+        counts = Counter()
+        for row in rows:
+            row.attempts += 1
+            row.updated = now
+            if id(emails[id(row)]) in sent:
+                row.state = Outbox.STATE.sent
+                row.sent = now
+                counts['sent'] += 1
+            elif row.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                row.state = Outbox.STATE.failed
+                counts['failed'] += 1
+            else:
+                row.next_attempt = now + datetime.timedelta(
+                    seconds=settings.MAILER_BACKOFF * 2 ** row.attempts,
+                )
+                counts['retried'] += 1
+        Outbox.objects.bulk_update(
+            rows,
+            ['state', 'attempts', 'next_attempt', 'sent', 'updated'],
+        )
+    return counts
@@ -0,0 +1,34 @@
+import tempfile
+import time
+
+from app.caches import get_active_issue
+from app.letters import merge_letters
+from app.tasks import get_packet_comments
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+
+class Command(BaseCommand):
+    help = "Time a cold-cache packet merge, one process per letter against chunked."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=200,
+        )
+
+    def handle(self, *args, **options):
+        comments = list(get_packet_comments(get_active_issue())[:options['count']])
+        # A chunk size of one is a wkhtmltopdf process per letter
+        for label, chunk_size in [('per letter', 1), ('chunked', None)]:
+            with tempfile.TemporaryDirectory() as cache, \
+                    override_settings(LETTERS_CACHE_DIR=cache), \
+                    tempfile.NamedTemporaryFile(suffix='.pdf') as output:
+                start = time.perf_counter()
+                merge_letters(comments, output.name, chunk_size=chunk_size)
+                elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f"{label}: {len(comments)} letters in {elapsed:.1f}s ({elapsed / max(len(comments), 1) * 1000:.0f}ms per letter)"
+            )
+        return
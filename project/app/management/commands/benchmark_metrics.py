@@ -0,0 +1,53 @@
+from unittest import mock
+
+from app.caches import clear_local
+from app.context_processors import metrics
+from django.core.cache import cache
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+
+def legacy_metrics(request):
+    return {
+        'METRICS' : {
+            'members': cache.get('member_count'),
+            'comments': cache.get('comment_count'),
+            'students': cache.get('student_count'),
+        }
+    }
+
+
+class Command(BaseCommand):
+    help = "Count the Redis round trips per request spent on the header metrics."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=1000,
+        )
+
+    def handle(self, *args, **options):
+        total = options['requests']
+        factory = RequestFactory()
+        backend = caches['default']
+        processors = [
+            ('before', legacy_metrics),
+            ('after', metrics),
+        ]
+        for label, processor in processors:
+            for renders in [True, False]:
+                clear_local()
+                with mock.patch.object(backend, 'get', wraps=backend.get) as get, \
+                        mock.patch.object(backend, 'get_many', wraps=backend.get_many) as get_many:
+                    for _ in range(total):
+                        context = processor(factory.get('/'))
+                        if renders:
+                            context['METRICS']['members']
+                    trips = get.call_count + get_many.call_count
+                page = 'index' if renders else 'footer'
+                self.stdout.write(
+                    f"{label} ({page}): {trips} round trips over {total} requests, {trips / total:.3f} per request"
+                )
+        return
@@ -0,0 +1,58 @@
+import pickle
+import time
+
+from app.jobs import dump
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+Account = apps.get_model("app", "Account")
+User = apps.get_model("app", "User")
+
+
+def get_payload(task, args):
+    # The same tuple RQ pickles into the job hash
+    return pickle.dumps(
+        (task, None, args, {}),
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+
+
+class Command(BaseCommand):
+    help = "Compare RQ payload sizes for pickled instances and model references."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=1000,
+        )
+
+    def handle(self, *args, **options):
+        samples = [
+            ('create_or_update_mailchimp_from_user', User.objects.select_related(
+                'account',
+            ).first()),
+            ('send_verification_email', User.objects.first()),
+            ('update_zone_from_account', Account.objects.select_related(
+                'user',
+                'zone',
+            ).first()),
+            ('geocode_account', Account.objects.select_related(
+                'user',
+                'zone',
+            ).first()),
+        ]
+        iterations = options['iterations']
+        for task, instance in samples:
+            if instance is None:
+                self.stdout.write(f"{task}: no sample row")
+                continue
+            for label, arg in [('instance', instance), ('ref', dump(instance))]:
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    payload = get_payload(f'app.tasks.{task}', (arg,))
+                elapsed = (time.perf_counter() - start) / iterations * 1e6
+                self.stdout.write(
+                    f"{task} ({label}): {len(payload)} bytes, {elapsed:.1f}us to serialize"
+                )
+        return
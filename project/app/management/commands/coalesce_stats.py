@@ -0,0 +1,20 @@
+from app.jobs import get_counts
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Show skipped, coalesced, enqueued and executed counts for coalesced tasks."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tasks',
+            nargs='*',
+            default=['app.tasks.create_or_update_mailchimp_from_user'],
+        )
+
+    def handle(self, *args, **options):
+        for name in options['tasks']:
+            counts = get_counts(name)
+            summary = ", ".join(f"{value} {kind}" for kind, value in counts.items())
+            self.stdout.write(f"{name}: {summary}")
+        return
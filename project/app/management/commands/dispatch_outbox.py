@@ -0,0 +1,19 @@
+from app.tasks import drain_outbox
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Send every due email in the outbox; run on a schedule to pick up retries."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+        )
+
+    def handle(self, *args, **options):
+        totals = drain_outbox(options['batch_size'])
+        self.stdout.write(
+            f"{totals.get('sent', 0)} Sent, {totals.get('retried', 0)} Retried, {totals.get('failed', 0)} Failed."
+        )
+        return
@@ -0,0 +1,41 @@
+from app.tasks import geocode_accounts
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Geocode every account with an address but no point."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            default=10,
+            help="Maximum geocoder requests per second.",
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=100,
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help="Ignore the saved checkpoint and start from the beginning.",
+        )
+
+    def handle(self, *args, **options):
+        summary = geocode_accounts(
+            workers=options['workers'],
+            rate=options['rate'],
+            chunk_size=options['chunk_size'],
+            restart=options['restart'],
+        )
+        self.stdout.write(
+            f"{summary['precise']} Precise, {summary['imprecise']} Imprecise, {summary['failed']} Failed."
+        )
+        return
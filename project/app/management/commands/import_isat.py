@@ -0,0 +1,32 @@
+from app.importers import import_isat
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Upsert ISAT results for the district from a state CSV export."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'filename',
+        )
+        parser.add_argument(
+            'year',
+            type=int,
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+        )
+
+    def handle(self, *args, **options):
+        counts = import_isat(
+            options['filename'],
+            options['year'],
+            dry_run=options['dry_run'],
+        )
+        prefix = "(Dry Run) " if options['dry_run'] else ""
+        self.stdout.write(
+            f"{prefix}{counts['inserted']} Inserted, {counts['updated']} Updated, "
+            f"{counts['unchanged']} Unchanged, {counts['invalid']} Invalid, {counts['skipped']} Skipped."
+        )
+        return
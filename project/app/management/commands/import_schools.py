@@ -0,0 +1,36 @@
+from app.importers import import_enrollment
+from app.importers import import_staff
+from django.core.management.base import BaseCommand
+
+IMPORTERS = {
+    'staff': import_staff,
+    'enrollment': import_enrollment,
+}
+
+
+class Command(BaseCommand):
+    help = "Apply a district staff roster or enrollment CSV to the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'kind',
+            choices=IMPORTERS.keys(),
+        )
+        parser.add_argument(
+            'filename',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+        )
+
+    def handle(self, *args, **options):
+        importer = IMPORTERS[options['kind']]
+        counts = importer(
+            options['filename'],
+            dry_run=options['dry_run'],
+        )
+        prefix = "(Dry Run) " if options['dry_run'] else ""
+        summary = ", ".join(f"{value} {key.title()}" for key, value in counts.items())
+        self.stdout.write(f"{prefix}{summary}.")
+        return
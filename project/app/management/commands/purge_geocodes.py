@@ -0,0 +1,24 @@
+from app.geocoders import purge_geocodes
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Purge cached geocoder responses."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--address',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            help="Only purge entries not refreshed in this many days.",
+        )
+
+    def handle(self, *args, **options):
+        count = purge_geocodes(
+            address=options['address'],
+            days=options['days'],
+        )
+        self.stdout.write(f"{count} Geocodes Purged.")
+        return
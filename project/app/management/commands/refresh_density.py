@@ -0,0 +1,13 @@
+from app.tasks import refresh_density
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Rebuild the member-density aggregates; run periodically."
+
+    def handle(self, *args, **options):
+        counts = refresh_density()
+        self.stdout.write(
+            f"{counts['zones']} Zones, {counts['schools']} Schools, {counts['cells']} Cells Refreshed."
+        )
+        return
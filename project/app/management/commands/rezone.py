@@ -0,0 +1,37 @@
+from app.tasks import rezone_accounts
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+Account = apps.get_model("app", "Account")
+Zone = apps.get_model("app", "Zone")
+
+
+class Command(BaseCommand):
+    help = "Reassign every pointed account to the zone containing it."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+        )
+        parser.add_argument(
+            '--notify',
+            action='store_true',
+            help="Queue zone change emails for the accounts that moved.",
+        )
+
+    def handle(self, *args, **options):
+        moves = rezone_accounts(
+            dry_run=options['dry_run'],
+            notify=options['notify'],
+        )
+        accounts = Account.objects.in_bulk([move[0] for move in moves])
+        zones = Zone.objects.in_bulk()
+        for account_id, old_id, new_id in moves:
+            account = accounts.get(account_id, account_id)
+            old = zones.get(old_id, '(None)')
+            new = zones.get(new_id, '(None)')
+            self.stdout.write(f"{account}: {old} -> {new}")
+        prefix = "(Dry Run) " if options['dry_run'] else ""
+        self.stdout.write(f"{prefix}{len(moves)} Accounts Moved.")
+        return
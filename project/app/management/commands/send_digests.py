@@ -0,0 +1,16 @@
+from app.tasks import send_digests
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Send the pending comment digests; run on a schedule."
+
+    def handle(self, *args, **options):
+        summary = send_digests()
+        if summary is None:
+            self.stdout.write("Digests Already Running.")
+            return
+        self.stdout.write(
+            f"{summary['digests']} Digests Sent ({summary['comments']} Comments), {summary['failed']} Failed."
+        )
+        return
@@ -0,0 +1,16 @@
+from app.tasks import send_zone_campaign
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Queue a campaign email to every account in a zone, one job per batch."
+
+    def add_arguments(self, parser):
+        parser.add_argument('num', type=int)
+        parser.add_argument('template')
+        parser.add_argument('subject')
+
+    def handle(self, *args, **options):
+        batches = send_zone_campaign(options['num'], options['template'], options['subject'])
+        self.stdout.write(f"{batches} Batches Queued.")
+        return
@@ -1,22 +1,12 @@
-from django.apps import apps
-from django.core.cache import cache
+from app.caches import reconcile_metrics
 from django.core.management.base import BaseCommand
 
-Account = apps.get_model("app", "Account")
-Comment = apps.get_model("app", "Comment")
-Student = apps.get_model("app", "Student")
-
 
 class Command(BaseCommand):
-    def handle(self, *args, **options):
-        member_count = sum([
-            Account.objects.all().count(),
-            Account.objects.filter(is_spouse=True).count(),
-        ])
-        cache.set('member_count', member_count, timeout=None)
-        comment_count = Comment.objects.all().count()
-        cache.set('comment_count', comment_count, timeout=None)
+    help = "Reconcile the live membership counters against the database."
 
-        student_count = Student.objects.all().count()
-        cache.set('student_count', student_count, timeout=None)
+    def handle(self, *args, **options):
+        counts = reconcile_metrics()
+        for key, value in counts.items():
+            self.stdout.write(f"{key}: {value}")
         return
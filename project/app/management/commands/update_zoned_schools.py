@@ -0,0 +1,11 @@
+from app.tasks import update_zoned_schools
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Re-tag every pointed account with its zoned elementary, middle and high schools."
+
+    def handle(self, *args, **options):
+        count = update_zoned_schools()
+        self.stdout.write(f"{count} Zoned Schools Tagged.")
+        return
@@ -1,4 +1,5 @@
 from django.contrib.auth.base_user import BaseUserManager
+from django.db.models import Manager
 
 
 class UserManager(BaseUserManager):
@@ -29,3 +30,21 @@ class UserManager(BaseUserManager):
         if extra_fields.get('is_admin') is not True:
             raise ValueError('Superuser must have is_admin=True.')
         return self.create_user(username, password, **extra_fields)
+
+
+class CommentManager(Manager):
+    def wall(self, issue):
+        """
+        Approved public comments for the issue, as rendered on the wall.
+        """
+        return self.filter(
+            account__is_public=True,
+            state=self.model.STATE.approved,
+            account__user__is_active=True,
+            issue=issue,
+        ).only(
+            'id',
+            'content',
+            'card',
+            'created',
+        )
@@ -0,0 +1,71 @@
+from django.db import migrations, models
+
+
+ORDINALS = {
+    -1: 'PK',
+    0: 'K',
+    1: '1st',
+    2: '2nd',
+    3: '3rd',
+    4: '4th',
+    5: '5th',
+    6: '6th',
+    7: '7th',
+    8: '8th',
+    9: '9th',
+    10: '10th',
+    11: '11th',
+    12: '12th',
+}
+
+
+def forwards(apps, schema_editor):
+    Account = apps.get_model('app', 'Account')
+    Comment = apps.get_model('app', 'Comment')
+    accounts = Account.objects.filter(
+        comments__isnull=False,
+    ).prefetch_related(
+        'students__school',
+    ).distinct()
+    for account in accounts.iterator(chunk_size=500):
+        students = sorted(
+            account.students.all(),
+            key=lambda x: (x.school.kind, x.school.name, x.grade),
+        )
+        card = {
+            'name': account.name,
+            'picture': account.picture.name,
+            'is_spouse': account.is_spouse,
+            'students': [{
+                'school': student.school.name,
+                'full': student.school.full,
+                'kind': student.school.kind,
+                'ord': ORDINALS[student.grade],
+            } for student in students if student.school.kind in (10, 20, 30)],
+        }
+        comments = list(account.comments.only('id', 'content'))
+        for comment in comments:
+            comment.card = {
+                **card,
+                'wordcount': len(comment.content.split(" ")),
+            }
+        Comment.objects.bulk_update(comments, ['card'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0014_school_is_traditional'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='card',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(
+            forwards,
+            migrations.RunPython.noop,
+        ),
+    ]
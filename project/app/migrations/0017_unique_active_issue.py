@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0016_comment_wall'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='issue',
+            constraint=models.UniqueConstraint(condition=models.Q(('state', 10)), fields=('state',), name='unique_active_issue'),
+        ),
+    ]
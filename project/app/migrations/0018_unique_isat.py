@@ -0,0 +1,41 @@
+from django.db import migrations, models
+
+
+def dedupe(apps, schema_editor):
+    Isat = apps.get_model('app', 'Isat')
+    seen = set()
+    duplicates = []
+    isats = Isat.objects.order_by(
+        '-updated',
+    ).values_list(
+        'id',
+        'school',
+        'subject',
+        'grade',
+        'year',
+    )
+    for pk, *key in isats.iterator():
+        key = tuple(key)
+        if key in seen:
+            duplicates.append(pk)
+        else:
+            seen.add(key)
+    Isat.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0017_unique_active_issue'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            dedupe,
+            migrations.RunPython.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='isat',
+            constraint=models.UniqueConstraint(fields=('school', 'subject', 'grade', 'year'), name='unique_isat'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+import django.contrib.gis.db.models.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0018_unique_isat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='school',
+            name='boundary_simple',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, null=True, srid=4326),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+import hashid_field.field
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0019_school_boundary_simple'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Geocode',
+            fields=[
+                ('id', hashid_field.field.HashidAutoField(alphabet='abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890', min_length=7, prefix='', primary_key=True, serialize=False)),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('address', models.CharField(max_length=512)),
+                ('response', models.JSONField(blank=True, null=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ('-updated',),
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0020_geocode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='zoned_schools',
+            field=models.ManyToManyField(blank=True, related_name='zoned_accounts', to='app.school'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+import django.contrib.gis.db.models.fields
+import django.db.models.deletion
+import hashid_field.field
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0021_account_zoned_schools'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Density',
+            fields=[
+                ('id', hashid_field.field.HashidAutoField(alphabet='abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890', min_length=7, prefix='', primary_key=True, serialize=False)),
+                ('kind', models.IntegerField(choices=[(10, 'Zone'), (20, 'School'), (30, 'Cell')])),
+                ('point', django.contrib.gis.db.models.fields.PointField(blank=True, null=True, srid=4326)),
+                ('accounts', models.IntegerField(default=0)),
+                ('spouses', models.IntegerField(default=0)),
+                ('students', models.IntegerField(default=0)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('school', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='densities', to='app.school')),
+                ('zone', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='densities', to='app.zone')),
+            ],
+            options={
+                'ordering': ('kind', '-accounts'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='density',
+            index=models.Index(fields=['kind'], name='density_kind'),
+        ),
+    ]
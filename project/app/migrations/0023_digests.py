@@ -0,0 +1,39 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import hashid_field.field
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0022_density'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='delivery',
+            field=models.IntegerField(choices=[(0, 'Immediate'), (10, 'Digest')], default=0),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='is_letter_attached',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='Dispatch',
+            fields=[
+                ('id', hashid_field.field.HashidAutoField(alphabet='abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890', min_length=7, prefix='', primary_key=True, serialize=False)),
+                ('recipient', models.EmailField(max_length=254)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('comment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dispatches', to='app.comment')),
+            ],
+            options={
+                'ordering': ('-created',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dispatch',
+            constraint=models.UniqueConstraint(fields=('comment', 'recipient'), name='unique_dispatch'),
+        ),
+    ]
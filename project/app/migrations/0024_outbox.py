@@ -0,0 +1,40 @@
+from django.db import migrations, models
+import django.contrib.postgres.fields
+import django.utils.timezone
+import hashid_field.field
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0023_digests'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Outbox',
+            fields=[
+                ('id', hashid_field.field.HashidAutoField(alphabet='abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890', min_length=7, prefix='', primary_key=True, serialize=False)),
+                ('state', models.IntegerField(choices=[(-10, 'Failed'), (0, 'Pending'), (10, 'Sent')], default=0)),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('template', models.CharField(max_length=255)),
+                ('subject', models.CharField(max_length=255)),
+                ('from_email', models.CharField(max_length=255)),
+                ('to', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), default=list, size=None)),
+                ('cc', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), blank=True, default=list, size=None)),
+                ('body', models.TextField(blank=True)),
+                ('attempts', models.IntegerField(default=0)),
+                ('next_attempt', models.DateTimeField(default=django.utils.timezone.now)),
+                ('sent', models.DateTimeField(blank=True, null=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ('-created',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='outbox',
+            index=models.Index(fields=['state', 'next_attempt'], name='outbox_claim'),
+        ),
+    ]
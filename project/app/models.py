@@ -4,14 +4,18 @@ import datetime
 from django.contrib.auth.models import AbstractBaseUser
 from django.contrib.gis.db import models
 from django.contrib.postgres.fields import ArrayField
+from django.core.mail import EmailMessage
 from django.db.models.constraints import UniqueConstraint
+from django.utils import timezone
 from django_fsm import FSMIntegerField
 from django_fsm import transition
 from django_fsm_log.decorators import fsm_log_by
 from hashid_field import HashidAutoField
 from model_utils import Choices
+from model_utils import FieldTracker
 
 # Local
+from .managers import CommentManager
 from .managers import UserManager
 
 
@@ -84,6 +88,20 @@ class Account(models.Model):
         null=True,
         blank=True,
     )
+    zoned_schools = models.ManyToManyField(
+        'app.School',
+        related_name='zoned_accounts',
+        blank=True,
+    )
+
+    tracker = FieldTracker(
+        fields=[
+            'name',
+            'is_public',
+            'is_spouse',
+            'picture',
+        ],
+    )
 
     def __str__(self):
         return f"{self.name}"
@@ -152,6 +170,11 @@ class Comment(models.Model):
         max_length=2000,
         blank=False,
     )
+    card = models.JSONField(
+        blank=True,
+        null=True,
+        editable=False,
+    )
     account = models.ForeignKey(
         'app.Account',
         on_delete=models.CASCADE,
@@ -167,6 +190,14 @@ class Comment(models.Model):
         blank=False,
     )
 
+    objects = CommentManager()
+
+    tracker = FieldTracker(
+        fields=[
+            'state',
+        ],
+    )
+
     class Meta:
         constraints = [
             UniqueConstraint(
@@ -177,6 +208,17 @@ class Comment(models.Model):
                 name='unique_comment',
             )
         ]
+        indexes = [
+            models.Index(
+                fields=[
+                    'issue',
+                    'state',
+                    '-created',
+                    '-id',
+                ],
+                name='comment_wall',
+            ),
+        ]
         ordering = (
             '-created',
         )
@@ -199,18 +241,12 @@ class Comment(models.Model):
     @fsm_log_by
     @transition(field=state, source=[STATE.pending, STATE.denied], target=STATE.approved)
     def approve(self):
-        from .tasks import send_approval_email
-        from .tasks import send_comment
-        send_approval_email.delay(self)
-        if self.account.zone and self.account.zone.num !=2:
-            send_comment.delay(self)
+        # Emails are queued by comment_post_save once the row is committed
         return
 
     @fsm_log_by
     @transition(field=state, source=[STATE.pending, STATE.approved], target=STATE.denied)
     def deny(self):
-        from .tasks import send_denial_email
-        send_denial_email.delay(self.account)
         return
 
 
@@ -220,6 +256,105 @@ class Comment(models.Model):
         return
 
 
+class Density(models.Model):
+    id = HashidAutoField(
+        primary_key=True,
+    )
+    KIND = Choices(
+        (10, 'zone', 'Zone'),
+        (20, 'school', 'School'),
+        (30, 'cell', 'Cell'),
+    )
+    kind = models.IntegerField(
+        choices=KIND,
+        blank=False,
+        null=False,
+    )
+    zone = models.ForeignKey(
+        'app.Zone',
+        on_delete=models.CASCADE,
+        related_name='densities',
+        null=True,
+        blank=True,
+    )
+    school = models.ForeignKey(
+        'app.School',
+        on_delete=models.CASCADE,
+        related_name='densities',
+        null=True,
+        blank=True,
+    )
+    point = models.PointField(
+        null=True,
+        blank=True,
+    )
+    accounts = models.IntegerField(
+        default=0,
+    )
+    spouses = models.IntegerField(
+        default=0,
+    )
+    students = models.IntegerField(
+        default=0,
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+    )
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.accounts}"
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=[
+                    'kind',
+                ],
+                name='density_kind',
+            ),
+        ]
+        ordering = (
+            'kind',
+            '-accounts',
+        )
+
+
+class Dispatch(models.Model):
+    id = HashidAutoField(
+        primary_key=True,
+    )
+    recipient = models.EmailField(
+        blank=False,
+    )
+    comment = models.ForeignKey(
+        'app.Comment',
+        on_delete=models.CASCADE,
+        related_name='dispatches',
+        null=False,
+        blank=False,
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+    )
+
+    def __str__(self):
+        return f"{self.recipient}"
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=[
+                    'comment',
+                    'recipient',
+                ],
+                name='unique_dispatch',
+            )
+        ]
+        ordering = (
+            '-created',
+        )
+
+
 class Event(models.Model):
     id = HashidAutoField(
         primary_key=True,
@@ -293,6 +428,17 @@ class Issue(models.Model):
         null=True,
         blank=True,
     )
+    DELIVERY = Choices(
+        (0, 'immediate', 'Immediate'),
+        (10, 'digest', 'Digest'),
+    )
+    delivery = models.IntegerField(
+        choices=DELIVERY,
+        default=DELIVERY.immediate,
+    )
+    is_letter_attached = models.BooleanField(
+        default=False,
+    )
     date = models.DateField(
         default=datetime.date.today,
     )
@@ -306,11 +452,52 @@ class Issue(models.Model):
         return f"{self.name}"
 
     class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=[
+                    'state',
+                ],
+                condition=models.Q(state=10),
+                name='unique_active_issue',
+            )
+        ]
         ordering = (
             '-created',
         )
 
 
+class Geocode(models.Model):
+    id = HashidAutoField(
+        primary_key=True,
+    )
+    key = models.CharField(
+        max_length=64,
+        unique=True,
+    )
+    address = models.CharField(
+        max_length=512,
+        blank=False,
+    )
+    response = models.JSONField(
+        null=True,
+        blank=True,
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+    )
+
+    def __str__(self):
+        return f"{self.address}"
+
+    class Meta:
+        ordering = (
+            '-updated',
+        )
+
+
 class Isat(models.Model):
     id = HashidAutoField(
         primary_key=True,
@@ -390,6 +577,108 @@ class Isat(models.Model):
     def __str__(self):
         return f"{self.id}"
 
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=[
+                    'school',
+                    'subject',
+                    'grade',
+                    'year',
+                ],
+                name='unique_isat',
+            )
+        ]
+
+
+class Outbox(models.Model):
+    id = HashidAutoField(
+        primary_key=True,
+    )
+    STATE = Choices(
+        (-10, 'failed', 'Failed'),
+        (0, 'pending', 'Pending'),
+        (10, 'sent', 'Sent'),
+    )
+    state = models.IntegerField(
+        choices=STATE,
+        default=STATE.pending,
+    )
+    key = models.CharField(
+        max_length=64,
+        unique=True,
+    )
+    template = models.CharField(
+        max_length=255,
+        blank=False,
+    )
+    subject = models.CharField(
+        max_length=255,
+        blank=False,
+    )
+    from_email = models.CharField(
+        max_length=255,
+        blank=False,
+    )
+    to = ArrayField(
+        models.CharField(
+            max_length=255,
+        ),
+        default=list,
+    )
+    cc = ArrayField(
+        models.CharField(
+            max_length=255,
+        ),
+        default=list,
+        blank=True,
+    )
+    body = models.TextField(
+        blank=True,
+    )
+    attempts = models.IntegerField(
+        default=0,
+    )
+    next_attempt = models.DateTimeField(
+        default=timezone.now,
+    )
+    sent = models.DateTimeField(
+        null=True,
+        blank=True,
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+    )
+
+    def build(self):
+        return EmailMessage(
+            subject=self.subject,
+            body=self.body,
+            from_email=self.from_email,
+            to=self.to,
+            cc=self.cc,
+        )
+
+    def __str__(self):
+        return f"{self.key}"
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=[
+                    'state',
+                    'next_attempt',
+                ],
+                name='outbox_claim',
+            ),
+        ]
+        ordering = (
+            '-created',
+        )
+
 
 class School(models.Model):
     id = HashidAutoField(
@@ -457,6 +746,10 @@ class School(models.Model):
         null=True,
         blank=True,
     )
+    boundary_simple = models.MultiPolygonField(
+        null=True,
+        blank=True,
+    )
     zone = models.ForeignKey(
         'app.Zone',
         on_delete=models.SET_NULL,
@@ -471,6 +764,18 @@ class School(models.Model):
         auto_now=True,
     )
 
+    tracker = FieldTracker(
+        fields=[
+            'name',
+            'full',
+            'kind',
+            'is_traditional',
+            'capacity',
+            'boundary',
+            'boundary_simple',
+        ],
+    )
+
     def __str__(self):
         return f"{self.name}"
 
@@ -683,6 +988,14 @@ class User(AbstractBaseUser):
 
     objects = UserManager()
 
+    tracker = FieldTracker(
+        fields=[
+            'name',
+            'email',
+            'is_active',
+        ],
+    )
+
     @property
     def is_staff(self):
         return self.is_admin
@@ -0,0 +1,65 @@
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_bytes
+from django.utils.functional import cached_property
+from django.utils.http import urlsafe_base64_decode
+from django.utils.http import urlsafe_base64_encode
+
+
+def encode_cursor(obj):
+    raw = f"{obj.created.isoformat()}|{obj.id}"
+    return urlsafe_base64_encode(force_bytes(raw))
+
+def decode_cursor(cursor):
+    try:
+        raw = urlsafe_base64_decode(cursor).decode()
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+    created, _, pk = raw.partition('|')
+    created = parse_datetime(created)
+    if not created or not pk:
+        raise ValueError('Invalid cursor')
+    return created, pk
+
+
+class KeysetPage:
+    """
+    A page of a queryset ordered newest-first on (created, id).
+
+    Rows are fetched lazily, so a page handed to a cached template
+    fragment only hits the database on a cache miss.
+    """
+    def __init__(self, queryset, cursor=None, size=50):
+        self.queryset = queryset
+        self.cursor = cursor
+        self.size = size
+        self.has_next = False
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @cached_property
+    def object_list(self):
+        queryset = self.queryset.order_by(
+            '-created',
+            '-id',
+        )
+        if self.cursor:
+            created, pk = decode_cursor(self.cursor)
+            queryset = queryset.filter(
+                Q(created__lt=created) |
+                Q(created=created, id__lt=pk)
+            )
+        objects = list(queryset[:self.size + 1])
+        self.has_next = len(objects) > self.size
+        return objects[:self.size]
+
+    @cached_property
+    def next_cursor(self):
+        objects = self.object_list
+        if not self.has_next:
+            return None
+        return encode_cursor(objects[-1])
@@ -0,0 +1,113 @@
+from django.contrib.gis.geos import GEOSException
+
+from .caches import get_version
+from .models import School
+from .models import Zone
+
+_resolvers = {}
+
+
+class Resolver:
+    """
+    Point-in-polygon lookups against geometries held in memory.
+
+    Candidates are filtered on their bounding box before the prepared
+    geometry test, so a lookup never touches the database.
+    """
+    def __init__(self, entries):
+        self.entries = [
+            (obj, geom.extent, geom.prepared) for obj, geom in entries if geom
+        ]
+
+    def resolve(self, point):
+        if not point:
+            return None
+        for obj, (xmin, ymin, xmax, ymax), prepared in self.entries:
+            if xmin <= point.x <= xmax and ymin <= point.y <= ymax and prepared.contains(point):
+                return obj
+        return None
+
+    def resolve_many(self, points):
+        return [self.resolve(point) for point in points]
+
+
+class ZoneResolver(Resolver):
+    def __init__(self):
+        zones = list(Zone.objects.all())
+        super().__init__([(zone, zone.poly) for zone in zones])
+        # Points outside every zone fall back to 'Not in District'
+        self.fallback = next(
+            (zone for zone in zones if zone.num == 0 or zone.name == 'Not in District'),
+            None,
+        )
+
+    def resolve(self, point):
+        if not point:
+            return None
+        return super().resolve(point) or self.fallback
+
+
+class SchoolResolver:
+    """
+    Finds the traditional elementary, middle and high schools whose
+    attendance boundaries contain a point.
+    """
+    KINDS = {
+        'elementary': School.KIND.elementary,
+        'middle': School.KIND.middle,
+        'high': School.KIND.high,
+    }
+
+    def __init__(self):
+        schools = list(School.objects.filter(
+            is_traditional=True,
+        ).exclude(
+            boundary=None,
+        ))
+        self.resolvers = {
+            name: Resolver([
+                (school, school.boundary) for school in schools if school.kind == kind
+            ]) for name, kind in self.KINDS.items()
+        }
+
+    def resolve(self, point):
+        return {
+            name: resolver.resolve(point) for name, resolver in self.resolvers.items()
+        }
+
+    def resolve_many(self, points):
+        return [self.resolve(point) for point in points]
+
+
+def get_resolver(name, factory):
+    version = get_version(name)
+    cached = _resolvers.get(name)
+    if cached and cached[0] == version:
+        return cached[1]
+    resolver = factory()
+    _resolvers[name] = (version, resolver)
+    return resolver
+
+def get_zone_resolver():
+    return get_resolver('zones', ZoneResolver)
+
+def get_school_resolver():
+    return get_resolver('boundaries', SchoolResolver)
+
+def get_zoned_schools(point):
+    if not point:
+        return {name: None for name in SchoolResolver.KINDS}
+    try:
+        return get_school_resolver().resolve(point)
+    except GEOSException:
+        # Fall back to PostGIS if the in-memory index can't answer
+        schools = School.objects.filter(
+            is_traditional=True,
+            boundary__contains=point,
+        )
+        zoned = {name: None for name in SchoolResolver.KINDS}
+        for school in schools:
+            for name, kind in SchoolResolver.KINDS.items():
+                if school.kind == kind:
+                    zoned[name] = school
+        return zoned
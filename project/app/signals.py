@@ -4,38 +4,180 @@ import urllib
 
 from django.conf import settings
 from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import post_delete
 from django.db.models.signals import post_save
 from django.db.models.signals import pre_delete
+from django.db.models.signals import pre_save
 from django.dispatch import receiver
 
+from .caches import bump_version
+from .caches import clear_active_issue
+from .caches import incr_metric
+from .jobs import incr_count
+from .models import Account
+from .models import Comment
+from .models import Issue
+from .models import School
+from .models import Student
 from .models import User
+from .models import Zone
 from .tasks import alias_posthog_from_user
 from .tasks import create_account_from_user
-from .tasks import create_or_update_mailchimp_from_user
 from .tasks import create_or_update_posthog_from_user
-from .tasks import delete_auth0_from_user
+from .tasks import delete_auth0_from_username
 from .tasks import delete_mailchimp_from_email
+from .tasks import denorm_comment
 from .tasks import identify_posthog_from_user
+from .tasks import queue_mailchimp_sync
+from .tasks import queue_zoned_schools
+from .tasks import send_comment_emails
+from .tasks import update_cards_from_account
+from .tasks import update_cards_from_school
 from .tasks import update_user_from_auth0
 
 log = logging.getLogger(__name__)
 
+MAILCHIMP_SYNC = 'app.tasks.create_or_update_mailchimp_from_user'
+
+
+def bump_cache(name):
+    # Bump again on commit in case a reader cached pre-commit rows under the new version
+    bump_version(name)
+    transaction.on_commit(lambda: bump_version(name))
+    return
+
+def bump_comments():
+    bump_cache('comments')
+    return
 
 
 @receiver(post_save, sender=User)
 def user_post_save(sender, instance, created, **kwargs):
     if created:
         create_account_from_user(instance)
-    create_or_update_mailchimp_from_user.delay(instance)
+    if not created and instance.tracker.has_changed('is_active'):
+        # The wall only shows active members
+        bump_comments()
+    if not created and not any([
+        instance.tracker.has_changed('name'),
+        instance.tracker.has_changed('email'),
+    ]):
+        # Logins save the user; only name and email reach Mailchimp
+        incr_count(MAILCHIMP_SYNC, 'skipped')
+        return
+    # The worker reads the row back, so wait for it to commit
+    transaction.on_commit(lambda: queue_mailchimp_sync(instance))
     # create_or_update_posthog_from_user.delay(instance)
     return
 
 @receiver(pre_delete, sender=User)
 def user_pre_delete(sender, instance, **kwargs):
-    delete_auth0_from_user.delay(instance)
+    delete_auth0_from_username.delay(instance.username)
     delete_mailchimp_from_email.delay(instance.email)
     return
 
+@receiver(post_save, sender=Account)
+def account_post_save(sender, instance, created, **kwargs):
+    if created:
+        incr_metric('member_count', 1 + instance.is_spouse)
+    elif instance.tracker.has_changed('is_spouse'):
+        incr_metric('member_count', 1 if instance.is_spouse else -1)
+    if created or instance.tracker.changed():
+        bump_comments()
+    if not created and any([
+        instance.tracker.has_changed('name'),
+        instance.tracker.has_changed('picture'),
+        instance.tracker.has_changed('is_spouse'),
+    ]):
+        update_cards_from_account(instance)
+    if not created and instance.tracker.has_changed('name'):
+        transaction.on_commit(lambda: queue_mailchimp_sync(instance.user))
+    return
+
+@receiver(post_delete, sender=Account)
+def account_post_delete(sender, instance, **kwargs):
+    incr_metric('member_count', -(1 + instance.is_spouse))
+    bump_comments()
+    return
+
+@receiver(pre_save, sender=Comment)
+def comment_pre_save(sender, instance, **kwargs):
+    instance.card = denorm_comment(instance)
+    return
+
+@receiver(post_save, sender=Comment)
+def comment_post_save(sender, instance, created, **kwargs):
+    if created:
+        incr_metric('comment_count')
+    if instance.tracker.has_changed('state'):
+        transaction.on_commit(lambda: send_comment_emails(instance))
+    bump_comments()
+    return
+
+@receiver(post_delete, sender=Comment)
+def comment_post_delete(sender, instance, **kwargs):
+    incr_metric('comment_count', -1)
+    bump_comments()
+    return
+
+@receiver(post_save, sender=Issue)
+@receiver(post_delete, sender=Issue)
+def issue_post_change(sender, instance, **kwargs):
+    # Clear again on commit in case a reader re-cached the old row mid-transaction
+    clear_active_issue()
+    transaction.on_commit(clear_active_issue)
+    return
+
+@receiver(post_save, sender=School)
+def school_post_save(sender, instance, created, **kwargs):
+    if created or instance.tracker.changed():
+        bump_cache('boundaries')
+        transaction.on_commit(queue_zoned_schools)
+    if not created and any([
+        instance.tracker.has_changed('name'),
+        instance.tracker.has_changed('full'),
+        instance.tracker.has_changed('kind'),
+    ]):
+        # Cards persist the badge, so rebuild them rather than just re-render
+        bump_comments()
+        transaction.on_commit(lambda: update_cards_from_school.delay(instance))
+    return
+
+@receiver(post_delete, sender=School)
+def school_post_delete(sender, instance, **kwargs):
+    bump_cache('boundaries')
+    transaction.on_commit(queue_zoned_schools)
+    return
+
+@receiver(post_save, sender=Zone)
+@receiver(post_delete, sender=Zone)
+def zone_post_change(sender, instance, **kwargs):
+    bump_cache('zones')
+    return
+
+@receiver(post_save, sender=Student)
+def student_post_save(sender, instance, created, **kwargs):
+    if created:
+        incr_metric('student_count')
+    refresh_student_account(instance)
+    return
+
+@receiver(post_delete, sender=Student)
+def student_post_delete(sender, instance, **kwargs):
+    incr_metric('student_count', -1)
+    refresh_student_account(instance)
+    return
+
+def refresh_student_account(instance):
+    account = Account.objects.filter(
+        pk=instance.account_id,
+    ).first()
+    if account:
+        update_cards_from_account(account)
+    bump_comments()
+    return
+
 
 # @receiver(user_logged_in)
 # def user_logged_in(sender, request, user, **kwargs):
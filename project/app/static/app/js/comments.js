@@ -0,0 +1,24 @@
+document.addEventListener('DOMContentLoaded', () => {
+  const button = document.getElementById('comments-more');
+  if (!button) {
+    return;
+  }
+  const body = document.getElementById('comments-body');
+  button.addEventListener('click', async () => {
+    button.disabled = true;
+    const params = new URLSearchParams({cursor: button.dataset.cursor});
+    const response = await fetch(`${button.dataset.url}?${params}`);
+    if (!response.ok) {
+      button.disabled = false;
+      return;
+    }
+    const data = await response.json();
+    body.insertAdjacentHTML('beforeend', data.html);
+    if (data.cursor) {
+      button.dataset.cursor = data.cursor;
+      button.disabled = false;
+    } else {
+      button.remove();
+    }
+  });
+});
@@ -0,0 +1,33 @@
+document.addEventListener('DOMContentLoaded', async () => {
+  const container = document.getElementById('zoned-schools');
+  if (!container) {
+    return;
+  }
+  const response = await fetch(container.dataset.url);
+  if (!response.ok) {
+    return;
+  }
+  const schools = Object.values(await response.json()).filter(Boolean);
+  if (!schools.length) {
+    return;
+  }
+  // Fill the first student row that doesn't have a school yet
+  const emptySelect = () => Array.from(
+    document.querySelectorAll('select[name$="-school"]')
+  ).find((select) => !select.value);
+  schools.forEach((school) => {
+    const link = document.createElement('a');
+    link.href = '#';
+    link.className = 'badge badge-light ml-2';
+    link.textContent = school.name;
+    link.addEventListener('click', (event) => {
+      event.preventDefault();
+      const select = emptySelect();
+      if (select) {
+        select.value = school.id;
+      }
+    });
+    container.appendChild(link);
+  });
+  container.classList.remove('d-none');
+});
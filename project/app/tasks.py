@@ -1,28 +1,61 @@
 # Standard Libary
 import csv
+import io
 import json
 import logging
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 import cloudinary
-import geocoder
 import posthog
-import pydf
 # First-Party
 from auth0.v3.authentication import GetToken
 from auth0.v3.management import Auth0
 # Django
 from django.conf import settings
 from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.core.files import File
 from django.core.mail import EmailMultiAlternatives
+from django.db import connections
+from django.db import transaction
 from django.template.loader import render_to_string
-from django_rq import job
+from django.utils.text import slugify
 from mailchimp3 import MailChimp
 from mailchimp3.helpers import get_subscriber_hash
 from mailchimp3.mailchimpclient import MailChimpError
+from rq import get_current_job
 
+from .caches import bump_version
+from .geocoders import RateLimiter
+from .geocoders import geocode_address
+from .geocoders import get_cached_geocodes
+from .geocoders import get_geocoder
+from .geocoders import get_key
+from .geocoders import is_success
+from .importers import chunked
+from .jobs import coalesce
+from .jobs import job
+from .letters import get_letter
+from .letters import get_packet_storage
+from .letters import merge_letters
+from .mailers import deliver
+from .mailers import dispatch_outbox
+from .mailers import queue_email
+from .mailers import send_bulk
 from .models import Account
+from .models import Comment
+from .models import Density
+from .models import Dispatch
+from .models import Geocode
+from .models import Issue
 from .models import School
+from .models import Student
 from .models import Zone
+from .resolvers import get_school_resolver
+from .resolvers import get_zone_resolver
 
 log = logging.getLogger(__name__)
 
@@ -50,9 +83,10 @@ def get_auth0_data(user_id):
     return data
 
 @job
-def delete_auth0_from_user(user):
+def delete_auth0_from_username(username):
+    # Runs after the user row is gone, so it takes the username
     client = get_auth0_client()
-    response = client.users.delete(user.username)
+    response = client.users.delete(username)
     return response
 
 
@@ -143,6 +177,13 @@ def create_or_update_mailchimp_from_user(user):
         raise err
     return result
 
+def queue_mailchimp_sync(user):
+    return coalesce(
+        create_or_update_mailchimp_from_user,
+        user,
+        settings.MAILCHIMP_SYNC_DELAY,
+    )
+
 @job
 def delete_mailchimp_from_email(email):
     client = get_mailchimp_client()
@@ -222,49 +263,84 @@ def alias_posthog_from_user(user, distinct_id):
     )
     return
 
+def queue_outbox(instance, recipient, **kwargs):
+    row, created = queue_email(instance, recipient, **kwargs)
+    if created:
+        transaction.on_commit(drain_outbox.delay)
+    return row
+
 @job
-def send_denial_email(account):
-    # comments = account.comments
-    email = build_email(
+def drain_outbox(batch_size=None):
+    totals = Counter()
+    while counts := dispatch_outbox(batch_size):
+        totals.update(counts)
+    return dict(totals)
+
+def send_denial_email(comment):
+    email = comment.account.user.email
+    return queue_outbox(
+        comment,
+        email,
         template='emails/denied.txt',
         subject='Comment Not Approved',
-        # context={'comments': comments},
-        to=[account.user.email],
+        from_email='David Binetti (WAPA) <dbinetti@westadaparents.com>',
+        to=[email],
     )
-    return email.send()
 
-@job
 def send_approval_email(comment):
-    email = build_email(
+    email = comment.account.user.email
+    return queue_outbox(
+        comment,
+        email,
         template='emails/approved.txt',
         subject='Comment Approved!',
+        from_email='David Binetti (WAPA) <dbinetti@westadaparents.com>',
+        to=[email],
         context={'comment': comment},
-        to=[comment.account.user.email],
     )
-    return email.send()
-
 
-@job
 def send_comment(comment):
     account = comment.account
     if not account.zone:
         return
-    from_email = f"{account.name} (WAPA) <{account.id}@westadaparents.com>"
-    to_emails = [
-        f"{account.zone.trustee_name} <{account.zone.trustee_email}>",
-    ]
-    email = build_email(
+    row = queue_outbox(
+        comment,
+        account.zone.trustee_email,
         template='emails/comment.txt',
         subject=f'{comment.issue.name}',
+        from_email=f"{account.name} (WAPA) <{account.id}@westadaparents.com>",
+        to=[f"{account.zone.trustee_name} <{account.zone.trustee_email}>"],
+        cc=[account.user.email],
         context={
             'comment': comment,
             'account': account,
         },
-        from_email=from_email,
-        to=to_emails,
-        cc=[account.user.email],
     )
-    return email.send()
+    Dispatch.objects.get_or_create(
+        comment=comment,
+        recipient=account.zone.trustee_email,
+    )
+    return row
+
+def send_comment_emails(comment):
+    """
+    Queue the emails for a comment's new state.
+
+    Runs on commit from comment_post_save, so the comment has a pk for
+    the outbox keys and Dispatch rows.
+    """
+    if comment.state == Comment.STATE.denied:
+        send_denial_email(comment)
+        return
+    if comment.state != Comment.STATE.approved:
+        return
+    send_approval_email(comment)
+    if comment.issue.delivery == comment.issue.DELIVERY.digest:
+        # Delivered in the next scheduled digest instead
+        return
+    if comment.account.zone and comment.account.zone.num != 2:
+        send_comment(comment)
+    return
 
 @job
 def link_account(account, voter_json):
@@ -293,137 +369,463 @@ def unlink_account(account):
     account.save()
     return account
 
-def denorm_students(account):
-    schools = School.objects.filter(
-        students__account=account
+def denorm_account(account):
+    students = Student.objects.filter(
+        account=account,
+    ).select_related(
+        'school',
     ).order_by(
-        'kind',
-    ).distinct()
-    output = []
-    mapping = {
-        -1: 'PK',
-        0: 'K',
-        1: '1st',
-        2: '2nd',
-        3: '3rd',
-        4: '4th',
-        5: '5th',
-        6: '6th',
-        7: '7th',
-        8: '8th',
-        9: '9th',
-        10: '10th',
-        11: '11th',
-        12: '12th',
+        'school__kind',
+        'school__name',
+        'grade',
+    )
+    return {
+        'name': account.name,
+        'picture': account.picture.name,
+        'is_spouse': account.is_spouse,
+        'students': [{
+            'school': student.school.name,
+            'full': student.school.full,
+            'kind': student.school.kind,
+            'ord': student.ord,
+        } for student in students if student.school.kind in School.KIND],
     }
-    for school in schools:
-        grades = school.students.filter(
-            account=account,
-        ).values_list('grade', flat=True)
-        try:
-            listed = ", ".join([mapping[x] for x in grades])
-        except KeyError:
-            continue
-        flat = f'{school.name} {listed}'
-        output.append(flat)
-    account.output = output
+
+def denorm_comment(comment, card=None):
+    if card is None:
+        card = denorm_account(comment.account)
+    return {
+        **card,
+        'wordcount': comment.wordcount,
+    }
+
+def update_cards_from_account(account):
+    card = denorm_account(account)
+    comments = list(account.comments.only(
+        'id',
+        'content',
+    ))
+    for comment in comments:
+        comment.card = denorm_comment(comment, card)
+    Comment.objects.bulk_update(
+        comments,
+        ['card'],
+    )
+    return
 
 
 @job
-def send_zone_one(account):
-    if account.zone.num != 1:
-        return
+def update_cards_from_school(school):
+    accounts = Account.objects.filter(
+        students__school=school,
+    ).distinct()
+    for account in accounts:
+        update_cards_from_account(account)
+    bump_version('comments')
+    return
+
+@job
+def send_zone_campaign(num, template, subject, batch_size=None):
+    """
+    Queue a campaign email to every account in the zone numbered num.
+
+    The zone's account ids are streamed once and fanned out as one
+    send_mailing_batch job per batch, so each job sends a bounded number
+    of messages well inside the RQ timeout.  Returns the batches queued.
+    """
+    batch_size = batch_size or settings.MAILER_BATCH_SIZE
+    ids = Account.objects.filter(
+        zone__num=num,
+    ).order_by(
+        'id',
+    ).values_list(
+        'id',
+        flat=True,
+    ).iterator(chunk_size=batch_size)
+    batches = 0
+    for batch in chunked(ids, batch_size):
+        send_mailing_batch.delay([str(pk) for pk in batch], template, subject)
+        batches += 1
+    return batches
+
+
+def build_zone_change(account, new, old=None):
     from_email = "David Binetti (WAPA) <dbinetti@westadaparents.com>"
-    first_name = account.name.split(" ")[0]
-    if account.name == 'Unknown':
-        to_block = [f'{account.name} <{account.user.email}>']
-    else:
-        to_block = [f'{account.user.email}']
-    email = build_email(
-        template='emails/zone_one.txt',
-        subject='Lori Frasure for West Ada School Board',
+    to_block = [f'{account.user.email}']
+    return build_email(
+        template='emails/change.txt',
+        subject='Notification of West Ada Zone Change',
         context={
-            'first_name': first_name,
+            'new': new,
+            'old': old or account.zone,
+            'account': account,
         },
         from_email=from_email,
         to=to_block,
     )
-    return email.send()
 
+@job
+def zone_change(account, new, old=None):
+    email = build_zone_change(account, new, old)
+    return email.send()
 
 @job
-def send_zone_three(account):
-    if account.zone.num != 3:
-        return
+def send_zone_changes(moves):
+    accounts = Account.objects.select_related(
+        'user',
+    ).in_bulk([move[0] for move in moves])
+    zones = Zone.objects.in_bulk({zone for move in moves for zone in move[1:] if zone})
+    emails = []
+    for account_id, old_id, new_id in moves:
+        account = accounts.get(account_id)
+        new = zones.get(new_id)
+        if not account or not new:
+            continue
+        emails.append(build_zone_change(account, new, zones.get(old_id)))
+    return send_bulk(emails)
+
+def build_mailing(account, template, subject, context=None):
     from_email = "David Binetti (WAPA) <dbinetti@westadaparents.com>"
-    first_name = account.name.split(" ")[0]
     if account.name == 'Unknown':
         to_block = [f'{account.name} <{account.user.email}>']
     else:
         to_block = [f'{account.user.email}']
-    email = build_email(
-        template='emails/zone_three.txt',
-        subject='Angie Redford for West Ada School Board',
+    return build_email(
+        template=template,
+        subject=subject,
         context={
-            'first_name': first_name,
+            'first_name': account.name.split(" ")[0],
+            'account': account,
+            **(context or {}),
         },
         from_email=from_email,
         to=to_block,
     )
-    return email.send()
 
+def send_mailing(accounts, template, subject, context=None, batch_size=None):
+    """
+    Render and send one template to every account in a queryset.
 
+    Accounts are streamed and rendered a batch at a time, and each batch
+    goes out over a single mail connection.  Not a job, since querysets
+    don't belong in RQ payloads; queue send_mailing_batch with ids.
+    """
+    batch_size = batch_size or settings.MAILER_BATCH_SIZE
+    accounts = accounts.select_related(
+        'user',
+    ).iterator(chunk_size=batch_size)
+    emails = (
+        build_mailing(account, template, subject, context) for account in accounts
+    )
+    return send_bulk(emails, batch_size)
 
 @job
-def zone_change(account, new):
-    from_email = "David Binetti (WAPA) <dbinetti@westadaparents.com>"
-    to_block = [f'{account.user.email}']
-    email = build_email(
-        template='emails/change.txt',
-        subject='Notification of West Ada Zone Change',
-        context={
-            'new': new,
-            'account': account,
-        },
-        from_email=from_email,
-        to=to_block,
+def send_mailing_batch(account_ids, template, subject, context=None):
+    """
+    Send one batch of a campaign to the accounts with account_ids.
+    """
+    accounts = Account.objects.filter(
+        id__in=account_ids,
+    ).select_related(
+        'user',
+        'zone',
+    ).order_by(
+        'id',
     )
-    return email.send()
+    return send_mailing(accounts, template, subject, context, batch_size=len(account_ids))
 
+REZONE_SQL = """
+    WITH moves AS (
+        SELECT DISTINCT ON (account.id)
+            account.id AS account_id,
+            account.zone_id AS old_zone_id,
+            COALESCE(zone.id, %(fallback)s) AS new_zone_id
+        FROM {account} account
+        LEFT JOIN {zone} zone
+            ON zone.poly IS NOT NULL AND ST_Contains(zone.poly, account.point)
+        WHERE account.point IS NOT NULL
+        ORDER BY account.id, zone.num
+    )
+"""
 
+def rezone_accounts(dry_run=False, notify=False, batch_size=100):
+    """
+    Recompute every pointed account's zone in one spatial join.
 
-def get_letter_from_comment(comment):
-    context={
-        'comment': comment,
+    Returns the (account, old zone, new zone) moves as hashid strings;
+    with dry_run nothing is written.
+    """
+    fallback = get_zone_resolver().fallback
+    sql = REZONE_SQL.format(
+        account=Account._meta.db_table,
+        zone=Zone._meta.db_table,
+    )
+    if dry_run:
+        sql += """
+            SELECT account_id, old_zone_id, new_zone_id FROM moves
+            WHERE old_zone_id IS DISTINCT FROM new_zone_id
+        """
+    else:
+        sql += """
+            UPDATE {account} account
+            SET zone_id = moves.new_zone_id, updated = NOW()
+            FROM moves
+            WHERE account.id = moves.account_id
+                AND account.zone_id IS DISTINCT FROM moves.new_zone_id
+            RETURNING account.id, moves.old_zone_id, moves.new_zone_id
+        """.format(account=Account._meta.db_table)
+    with transaction.atomic(), connections['default'].cursor() as cursor:
+        cursor.execute(sql, {
+            'fallback': fallback.pk.id if fallback else None,
+        })
+        rows = cursor.fetchall()
+    encode_account = Account._meta.pk.encode_id
+    encode_zone = Zone._meta.pk.encode_id
+    moves = [(
+        str(encode_account(account_id)),
+        str(encode_zone(old_id)) if old_id else None,
+        str(encode_zone(new_id)) if new_id else None,
+    ) for account_id, old_id, new_id in rows]
+    if notify and not dry_run:
+        for i in range(0, len(moves), batch_size):
+            send_zone_changes.delay(moves[i:i + batch_size])
+    return moves
+
+
+DENSITY_SQL = """
+    WITH members AS (
+        SELECT
+            account.id,
+            account.zone_id,
+            account.point,
+            account.is_spouse,
+            COUNT(student.id) AS students
+        FROM {account} account
+        LEFT JOIN {student} student
+            ON student.account_id = account.id
+        GROUP BY account.id
+    ), zones AS (
+        INSERT INTO {density} (kind, zone_id, accounts, spouses, students, created)
+        SELECT %(zone)s, zone_id, COUNT(*), COUNT(*) FILTER (WHERE is_spouse), SUM(students), NOW()
+        FROM members
+        WHERE zone_id IS NOT NULL
+        GROUP BY zone_id
+        RETURNING id
+    ), schools AS (
+        INSERT INTO {density} (kind, school_id, accounts, spouses, students, created)
+        SELECT %(school)s, school.id, COUNT(*), COUNT(*) FILTER (WHERE is_spouse), SUM(students), NOW()
+        FROM members
+        JOIN {school} school
+            ON school.is_traditional AND ST_Contains(school.boundary, members.point)
+        GROUP BY school.id
+        RETURNING id
+    ), cells AS (
+        INSERT INTO {density} (kind, point, accounts, spouses, students, created)
+        SELECT %(cell)s, ST_SnapToGrid(point, %(size)s), COUNT(*), COUNT(*) FILTER (WHERE is_spouse), SUM(students), NOW()
+        FROM members
+        WHERE point IS NOT NULL
+        GROUP BY ST_SnapToGrid(point, %(size)s)
+        HAVING COUNT(*) >= %(minimum)s
+        RETURNING id
+    )
+    SELECT
+        (SELECT COUNT(*) FROM zones),
+        (SELECT COUNT(*) FROM schools),
+        (SELECT COUNT(*) FROM cells)
+"""
+
+@job
+def refresh_density():
+    """
+    Rebuild the member-density aggregates per zone, school boundary and grid cell.
+
+    The old rows are swapped for the new ones in a single transaction, so
+    readers keep seeing the previous aggregates until the refresh commits.
+    Grid cells with fewer than DENSITY_MIN_COUNT members are suppressed.
+    """
+    sql = DENSITY_SQL.format(
+        account=Account._meta.db_table,
+        student=Student._meta.db_table,
+        school=School._meta.db_table,
+        density=Density._meta.db_table,
+    )
+    with transaction.atomic(), connections['default'].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {Density._meta.db_table}')
+        cursor.execute(sql, {
+            'zone': Density.KIND.zone,
+            'school': Density.KIND.school,
+            'cell': Density.KIND.cell,
+            'size': settings.DENSITY_CELL_SIZE,
+            'minimum': settings.DENSITY_MIN_COUNT,
+        })
+        zones, schools, cells = cursor.fetchone()
+        transaction.on_commit(lambda: bump_version('density'))
+    return {
+        'zones': zones,
+        'schools': schools,
+        'cells': cells,
     }
-    rendered = render_to_string('app/pdfs/letter.html', context)
-    pdf = pydf.generate_pdf(
-        rendered,
-        enable_smart_shrinking=False,
-        orientation='Portrait',
-        margin_top='10mm',
-        margin_bottom='10mm',
+
+
+def build_digests(issue):
+    """
+    Return (email, comments) for every digest recipient of an issue.
+
+    Trustees get the approved comments from their zone and the issue's
+    recipient_emails get all of them; comments already dispatched to a
+    recipient are left out.
+    """
+    comments = list(issue.comments.filter(
+        state=Comment.STATE.approved,
+    ).select_related(
+        'account',
+    ).order_by(
+        'created',
+    ))
+    dispatched = set(Dispatch.objects.filter(
+        comment__issue=issue,
+    ).values_list(
+        'comment_id',
+        'recipient',
+    ))
+    recipients = []
+    for zone in Zone.objects.exclude(trustee_email='').exclude(num=2):
+        recipients.append((zone.trustee_name, zone.trustee_email, [
+            comment for comment in comments if comment.account.zone_id == zone.id
+        ]))
+    for email in issue.recipient_emails or []:
+        recipients.append((issue.recipient_name, email, comments))
+    digests = []
+    for name, email, pool in recipients:
+        pending = [
+            comment for comment in pool if (comment.id, email) not in dispatched
+        ]
+        if not pending:
+            continue
+        digest = build_email(
+            template='emails/digest.txt',
+            subject=f'{issue.name}: {len(pending)} New Comment{"s" if len(pending) > 1 else ""}',
+            context={
+                'name': name,
+                'issue': issue,
+                'comments': pending,
+            },
+            to=[f'{name} <{email}>' if name else email],
+        )
+        if issue.is_letter_attached:
+            digest.attach('letters.pdf', merge_letter_from_comments(pending), 'application/pdf')
+        digests.append((digest, email, pending))
+    return digests
+
+@job
+def send_digests():
+    """
+    Send one digest per recipient for every issue in digest mode.
+
+    Dispatches are recorded only for the digests that went out, so a
+    comment is never delivered twice to the same recipient.
+    """
+    if not cache.add('digests_lock', 1, timeout=settings.DIGESTS_LOCK_TIMEOUT):
+        log.info('Digests already running')
+        return None
+    try:
+        digests = []
+        issues = Issue.objects.filter(
+            delivery=Issue.DELIVERY.digest,
+        ).exclude(
+            state=Issue.STATE.archived,
+        )
+        for issue in issues:
+            digests.extend(build_digests(issue))
+        sent, failed = deliver([digest for digest, _, _ in digests])
+        sent = {id(email) for email in sent}
+        dispatches = [
+            Dispatch(comment=comment, recipient=recipient)
+            for digest, recipient, comments in digests if id(digest) in sent
+            for comment in comments
+        ]
+        Dispatch.objects.bulk_create(
+            dispatches,
+            ignore_conflicts=True,
+        )
+    finally:
+        cache.delete('digests_lock')
+    return {
+        'digests': len(sent),
+        'failed': len(failed),
+        'comments': len(dispatches),
+    }
+
+
+def get_letter_from_comment(comment):
+    with open(get_letter(comment), 'rb') as f:
+        return f.read()
+
+def get_packet_comments(issue, zone=None):
+    comments = Comment.objects.filter(
+        issue=issue,
+        state=Comment.STATE.approved,
     )
-    return pdf
+    if zone:
+        comments = comments.filter(
+            account__zone=zone,
+        )
+    return comments.order_by(
+        'account__zone__num',
+        'created',
+    )
+
+@job('default', timeout=settings.PACKETS_TIMEOUT, result_ttl=settings.PACKETS_RESULT_TTL)
+def build_packet(issue_id, zone_id=None):
+    """
+    Build the board packet for an issue, or one zone of it, and upload it.
+
+    Progress is kept in the job's meta as done/total; the result is the
+    packet's name in the packet storage.
+    """
+    issue = Issue.objects.get(id=issue_id)
+    zone = Zone.objects.get(id=zone_id) if zone_id else None
+    comments = get_packet_comments(issue, zone)
+    total = comments.count()
+    job = get_current_job()
+
+    def progress(done):
+        if job and (done == total or not done % settings.PACKETS_PROGRESS_STEP):
+            job.meta.update({
+                'done': done,
+                'total': total,
+            })
+            job.save_meta()
+    progress(0)
+    name = slugify(issue.name)
+    if zone:
+        name += f'-zone-{zone.num}'
+    with tempfile.NamedTemporaryFile(suffix='.pdf') as f:
+        merge_letters(
+            comments.iterator(chunk_size=settings.PACKETS_PROGRESS_STEP),
+            f.name,
+            progress=progress,
+        )
+        with open(f.name, 'rb') as pdf:
+            return get_packet_storage().save(f'packets/{name}.pdf', File(pdf))
+
+def queue_packets(issue):
+    """
+    Queue the packet for an issue plus one per zone with approved comments.
+    """
+    zones = Zone.objects.filter(
+        account__comments__issue=issue,
+        account__comments__state=Comment.STATE.approved,
+    ).distinct()
+    jobs = [build_packet.delay(str(issue.id))]
+    for zone in zones:
+        jobs.append(build_packet.delay(str(issue.id), str(zone.id)))
+    return jobs
 
 def merge_letter_from_comments(comments):
-    output = ''
-    for comment in comments:
-        context={
-            'comment': comment,
-        }
-        rendered = render_to_string('app/pdfs/letter.html', context)
-        output += rendered
-    pdf = pydf.generate_pdf(
-        output,
-        enable_smart_shrinking=False,
-        orientation='Portrait',
-        margin_top='10mm',
-        margin_bottom='10mm',
-        margin_right='20mm',
-        margin_left='20mm',
-    )
-    return pdf
+    output = io.BytesIO()
+    merge_letters(comments, output)
+    return output.getvalue()
 
 # @job
 # def update_point_from_account(account):
@@ -447,33 +849,23 @@ def merge_letter_from_comments(comments):
 def update_zone_from_account(account):
     if not account.point:
         return
-    try:
-        zone = Zone.objects.get(
-            poly__contains=account.point,
-        )
-    except Zone.DoesNotExist:
-        zone = Zone.objects.get(
-            name='Not in District',
-        )
-    account.zone = zone
+    account.zone = get_zone_resolver().resolve(account.point)
     account.save()
     return
 
 
 def get_precision(geocode):
     return all([
-        geocode['accuracy'] == 'ROOFTOP',
+        geocode.get('accuracy') == 'ROOFTOP',
         any([
-            geocode['quality'] == 'premise',
-            geocode['quality'] == 'subpremise',
-            geocode['quality'] == 'street_address',
+            geocode.get('quality') == 'premise',
+            geocode.get('quality') == 'subpremise',
+            geocode.get('quality') == 'street_address',
         ])
     ])
 
-@job
-def geocode_account(account):
-    result = geocoder.google(account.address)
-    geocode = result.json
+def apply_geocode(account, geocode):
+    geocode = dict(geocode or {})
     is_precise = get_precision(geocode)
     if is_precise:
         account.is_precise = True
@@ -482,17 +874,192 @@ def geocode_account(account):
             geocode['lat'],
         )
         account.place = geocode['place']
-        try:
-            zone = Zone.objects.get(
-                poly__contains=account.point,
-            )
-        except Zone.DoesNotExist:
-            zone = Zone.objects.get(
-                num=0,
-            )
-        account.zone = zone
+        account.zone = get_zone_resolver().resolve(account.point)
     else:
         geocode['status'] = 'IMPRECISE'
         account.is_precise = False
     account.geocode = geocode
     return account
+
+@job
+def geocode_account(account):
+    geocode = geocode_address(account.address)
+    if geocode is None:
+        # Lookup failed; leave the account for a later retry
+        return account
+    account = apply_geocode(account, geocode)
+    account.save()
+    tag_zoned_schools([account], get_school_resolver())
+    return account
+
+def geocode_batch(accounts, backend, limiter, workers=4):
+    """
+    Geocode a chunk of accounts and write the results back in bulk.
+
+    Cache hits are read in one query; misses are fetched once per
+    unique address on a bounded thread pool under the rate limiter.
+    """
+    keys = {account.pk: get_key(account.address) for account in accounts}
+    responses = get_cached_geocodes(keys.values())
+    misses = {}
+    for account in accounts:
+        if keys[account.pk] not in responses:
+            misses.setdefault(keys[account.pk], account.address)
+    def fetch(address):
+        limiter.wait()
+        try:
+            return backend.geocode(address)
+        except Exception as e:
+            log.error(e)
+            return None
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        fetched = dict(zip(misses.keys(), executor.map(fetch, misses.values())))
+    Geocode.objects.bulk_create(
+        [Geocode(
+            key=key,
+            address=misses[key],
+            response=response,
+        ) for key, response in fetched.items() if is_success(response)],
+        update_conflicts=True,
+        unique_fields=[
+            'key',
+        ],
+        update_fields=[
+            'address',
+            'response',
+            'updated',
+        ],
+    )
+    responses.update(fetched)
+    counts = Counter()
+    geocoded = []
+    for account in accounts:
+        response = responses.get(keys[account.pk])
+        if not is_success(response):
+            counts['failed'] += 1
+            continue
+        apply_geocode(account, response)
+        counts['precise' if account.is_precise else 'imprecise'] += 1
+        geocoded.append(account)
+    Account.objects.bulk_update(
+        geocoded,
+        fields=[
+            'point',
+            'place',
+            'is_precise',
+            'geocode',
+            'zone',
+        ],
+    )
+    return counts
+
+@job('default', timeout=settings.GEOCODE_JOB_TIMEOUT)
+def geocode_accounts(workers=4, rate=10, chunk_size=100, restart=False, budget=None):
+    """
+    Geocode every account with an address but no point, from the checkpoint.
+
+    Under RQ the run stops after GEOCODE_JOB_BUDGET seconds and enqueues
+    its own continuation, so it never reaches the job timeout; run
+    directly it goes to the end unless given a budget.
+    """
+    if budget is None and get_current_job():
+        budget = settings.GEOCODE_JOB_BUDGET
+    start = time.monotonic()
+    checkpoint = None if restart else cache.get('geocode_checkpoint')
+    accounts = Account.objects.exclude(
+        address='',
+    ).filter(
+        point=None,
+        geocode=None,
+    ).order_by(
+        'id',
+    ).only(
+        'id',
+        'address',
+    )
+    if checkpoint:
+        accounts = accounts.filter(
+            id__gt=checkpoint,
+        )
+    backend = get_geocoder()
+    limiter = RateLimiter(rate)
+    totals = Counter()
+    batch = []
+    for account in accounts.iterator(chunk_size=chunk_size):
+        batch.append(account)
+        if len(batch) < chunk_size:
+            continue
+        totals.update(geocode_batch(batch, backend, limiter, workers))
+        cache.set('geocode_checkpoint', str(batch[-1].pk), timeout=None)
+        log.info(f'Geocoded through {batch[-1].pk}: {dict(totals)}')
+        batch = []
+        if budget and time.monotonic() - start > budget:
+            geocode_accounts.delay(workers, rate, chunk_size)
+            return {
+                'precise': totals['precise'],
+                'imprecise': totals['imprecise'],
+                'failed': totals['failed'],
+                'continued': True,
+            }
+    if batch:
+        totals.update(geocode_batch(batch, backend, limiter, workers))
+    cache.delete('geocode_checkpoint')
+    # Bulk updates skip the per-account tagging, so re-tag once at the end
+    queue_zoned_schools()
+    return {
+        'precise': totals['precise'],
+        'imprecise': totals['imprecise'],
+        'failed': totals['failed'],
+        'continued': False,
+    }
+
+def tag_zoned_schools(accounts, resolver):
+    Through = Account.zoned_schools.through
+    rows = []
+    for account in accounts:
+        for school in resolver.resolve(account.point).values():
+            if school:
+                rows.append(Through(
+                    account_id=account.pk,
+                    school_id=school.pk,
+                ))
+    with transaction.atomic():
+        Through.objects.filter(
+            account__in=accounts,
+        ).delete()
+        Through.objects.bulk_create(rows)
+    return len(rows)
+
+@job
+def update_zoned_schools(chunk_size=500):
+    """
+    Re-tag every pointed account with the schools zoned for its point.
+
+    Queued through queue_zoned_schools when boundaries change or a bulk
+    geocode finishes; the update_zoned_schools command runs it by hand.
+    """
+    resolver = get_school_resolver()
+    accounts = Account.objects.exclude(
+        point=None,
+    ).only(
+        'id',
+        'point',
+    )
+    count = 0
+    batch = []
+    for account in accounts.iterator(chunk_size=chunk_size):
+        batch.append(account)
+        if len(batch) < chunk_size:
+            continue
+        count += tag_zoned_schools(batch, resolver)
+        batch = []
+    if batch:
+        count += tag_zoned_schools(batch, resolver)
+    return count
+
+def queue_zoned_schools():
+    return coalesce(
+        update_zoned_schools,
+        None,
+        settings.ZONED_SCHOOLS_DELAY,
+    )
@@ -1,5 +1,7 @@
 # Django
 # Third-Party
+from unittest import mock
+
 import pytest
 from django.urls import reverse
 
@@ -12,3 +14,40 @@ def test_index(admin_client):
     path = reverse('admin:index')
     response = admin_client.get(path)
     assert response.status_code == 200
+
+@pytest.mark.django_db
+def test_density(admin_client):
+    path = reverse('density')
+    response = admin_client.get(path)
+    assert response.status_code == 200
+    assert response.json()['zones'] == []
+
+@pytest.mark.django_db
+def test_packet_unknown(admin_client):
+    path = reverse('packet', args=['missing'])
+    response = admin_client.get(path)
+    assert response.status_code == 404
+
+@pytest.mark.django_db
+def test_packet_finished(admin_client):
+    job = mock.Mock(
+        result='packets/issue.pdf',
+        meta={'done': 2, 'total': 2},
+    )
+    job.get_status.return_value = 'finished'
+    path = reverse('packet', args=['job'])
+    with mock.patch('app.views.django_rq.get_queue') as get_queue, \
+            mock.patch('app.views.get_packet_storage') as get_storage:
+        get_queue.return_value.fetch_job.return_value = job
+        get_storage.return_value.url.return_value = 'https://example.com/issue.pdf'
+        response = admin_client.get(path)
+        download = admin_client.get(path, {'download': 1})
+    get_storage.return_value.url.assert_called_with('packets/issue.pdf')
+    assert response.json() == {
+        'status': 'finished',
+        'done': 2,
+        'total': 2,
+        'url': 'https://example.com/issue.pdf',
+    }
+    assert download.status_code == 302
+    assert download.url == 'https://example.com/issue.pdf'
@@ -1,6 +1,13 @@
 # Django
 # Third-Party
+from unittest import mock
+
 import pytest
+from app.caches import _local
+from app.caches import get_active_issue
+from app.caches import get_version
+from app.models import Comment
+from django.core.cache import caches
 from django.urls import reverse
 
 
@@ -14,6 +21,71 @@ def test_index(anon_client, issue):
     response = anon_client.get(path)
     assert response.status_code == 200
 
+@pytest.mark.django_db
+def test_index_cached(anon_client, issue, django_assert_num_queries):
+    path = reverse('index')
+    anon_client.get(path)
+    with django_assert_num_queries(0):
+        response = anon_client.get(path)
+    assert response.status_code == 200
+
+@pytest.mark.django_db
+def test_index_deactivated(anon_client, issue, user):
+    account = user.account
+    account.is_public = True
+    account.save()
+    Comment.objects.create(
+        account=account,
+        issue=issue,
+        content='Visible Comment',
+        state=Comment.STATE.approved,
+    )
+    path = reverse('index')
+    assert b'Visible Comment' in anon_client.get(path).content
+    version = get_version('comments')
+    user.is_active = False
+    user.save()
+    assert get_version('comments') > version
+    assert b'Visible Comment' not in anon_client.get(path).content
+
+@pytest.mark.django_db
+def test_comments_more(anon_client, issue):
+    path = reverse('comments-more')
+    response = anon_client.get(path)
+    assert response.status_code == 200
+    assert response.json()['cursor'] is None
+
+@pytest.mark.django_db
+def test_comments_more_invalid(anon_client, issue):
+    path = reverse('comments-more')
+    response = anon_client.get(path, {'cursor': 'invalid'})
+    assert response.status_code == 400
+
+@pytest.mark.django_db
+def test_metrics_round_trips(anon_client, issue):
+    backend = caches['default']
+    with mock.patch.object(backend, 'get_many', wraps=backend.get_many) as get_many:
+        anon_client.get(reverse('about'))
+        assert get_many.call_count == 0
+        for _ in range(5):
+            anon_client.get(reverse('index'))
+        assert get_many.call_count == 1
+
+@pytest.mark.django_db
+def test_boundaries(anon_client):
+    path = reverse('boundaries', args=['elementary'])
+    response = anon_client.get(path, HTTP_ACCEPT_ENCODING='gzip')
+    assert response.status_code == 200
+    assert response['Content-Encoding'] == 'gzip'
+    response = anon_client.get(path, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == 304
+
+@pytest.mark.django_db
+def test_boundaries_unknown(anon_client):
+    path = reverse('boundaries', args=['preschool'])
+    response = anon_client.get(path)
+    assert response.status_code == 404
+
 def test_about(anon_client):
     path = reverse('about')
     response = anon_client.get(path)
@@ -69,3 +141,21 @@ def test_dashboard(anon_client):
     path = reverse('dashboard')
     response = anon_client.get(path)
     assert response.status_code == 302
+
+@pytest.mark.django_db
+def test_active_issue_other_process(issue):
+    assert get_active_issue() == issue
+    issue.state = issue.STATE.archived
+    issue.save()
+    # Another worker still holds the old memo; the version check must reject it
+    _local['active_issue'] = (float('inf'), get_version('active_issue') - 1, issue)
+    assert get_active_issue() is None
+
+@pytest.mark.django_db
+def test_active_issue_stale_payload(issue):
+    version = get_version('active_issue')
+    issue.state = issue.STATE.archived
+    issue.save()
+    # A reader that fetched the row before the commit sets it after the clear
+    caches['default'].set(f'active_issue_{version}', {'issue': issue})
+    assert get_active_issue() is None
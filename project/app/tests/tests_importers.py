@@ -0,0 +1,193 @@
+# Django
+# Third-Party
+import os
+
+import pytest
+from app.importers import import_boundary_file
+from app.importers import import_enrollment
+from app.importers import import_isat
+from app.importers import import_staff
+from app.models import Isat
+from app.models import School
+from app.models import Staff
+
+BOUNDARIES = os.path.join(os.path.dirname(__file__), 'boundaries.geojson')
+ENROLLMENT = os.path.join(os.path.dirname(__file__), 'enrollment.csv')
+ISAT = os.path.join(os.path.dirname(__file__), 'isat.csv')
+STAFF = os.path.join(os.path.dirname(__file__), 'staff.csv')
+
+
+@pytest.fixture
+def school():
+    school = School.objects.create(
+        name='Meridian',
+        full='Meridian High School',
+        kind=School.KIND.high,
+        school_id=201,
+        location_id=101,
+    )
+    return school
+
+
+@pytest.mark.django_db
+def test_import_staff(school):
+    Staff.objects.create(
+        name='Jane Doe',
+        position='Teacher',
+        school_raw='Meridian HS',
+        school=school,
+    )
+    john = Staff.objects.create(
+        name='John Roe',
+        position='Teacher',
+        school_raw='Meridian HS',
+        school=school,
+    )
+    # A duplicate from an earlier full reload, and someone who has left
+    Staff.objects.create(
+        name='John Roe',
+        position='Teacher',
+        school_raw='Meridian HS',
+        school=school,
+    )
+    Staff.objects.create(
+        name='Gone Person',
+        position='Teacher',
+        school_raw='Meridian HS',
+        school=school,
+    )
+    counts = {
+        'inserted': 1,
+        'updated': 1,
+        'unchanged': 1,
+        'deleted': 2,
+        'skipped': 1,
+    }
+    assert import_staff(STAFF, dry_run=True) == counts
+    assert Staff.objects.count() == 4
+    assert import_staff(STAFF) == counts
+    assert sorted(Staff.objects.values_list('name', 'position')) == [
+        ('Jane Doe', 'Teacher'),
+        ('John Roe', 'Principal'),
+        ('New Hire', 'Counselor'),
+    ]
+    assert Staff.objects.get(name='John Roe').pk == john.pk
+    assert Staff.objects.get(name='New Hire').school == school
+    assert import_staff(STAFF) == {
+        'inserted': 0,
+        'updated': 0,
+        'unchanged': 3,
+        'deleted': 0,
+        'skipped': 1,
+    }
+
+
+@pytest.mark.django_db
+def test_import_isat(school):
+    Isat.objects.create(
+        school=school,
+        subject=Isat.SUBJECT.math,
+        grade=Isat.GRADE.all,
+        year=2022,
+        advanced=40,
+        proficient=30,
+        basic=20,
+        below=10,
+    )
+    fourth = Isat.objects.create(
+        school=school,
+        subject=Isat.SUBJECT.english,
+        grade=Isat.GRADE.fourth,
+        year=2022,
+        advanced=10,
+        proficient=20,
+        basic=30,
+        below=40,
+    )
+    counts = {
+        'inserted': 2,
+        'updated': 1,
+        'unchanged': 1,
+        'invalid': 1,
+        'skipped': 1,
+    }
+    assert import_isat(ISAT, 2022, dry_run=True) == counts
+    assert Isat.objects.count() == 2
+    fourth.refresh_from_db()
+    assert fourth.advanced == 10
+    assert import_isat(ISAT, 2022) == counts
+    assert Isat.objects.count() == 4
+    # Upserted in place on (school, subject, grade, year)
+    fourth.refresh_from_db()
+    assert (fourth.advanced, fourth.below) == (25, 25)
+    third = Isat.objects.get(grade=Isat.GRADE.third)
+    assert (third.advanced, third.advanced_note) == (5, '<')
+    assert (third.proficient, third.proficient_note) == (None, 'N/A')
+    assert third.below_note == 'NSIZE'
+    assert not Isat.objects.filter(subject=Isat.SUBJECT.science).exists()
+    assert import_isat(ISAT, 2022) == {
+        'inserted': 0,
+        'updated': 0,
+        'unchanged': 4,
+        'invalid': 1,
+        'skipped': 1,
+    }
+
+
+@pytest.mark.django_db
+def test_import_boundary_file(school):
+    eagle = School.objects.create(
+        name='Eagle',
+        full='Eagle High School',
+        kind=School.KIND.high,
+    )
+    counts = {
+        'updated': 2,
+        'repaired': 1,
+        'skipped': 1,
+    }
+    assert import_boundary_file(BOUNDARIES, dry_run=True) == counts
+    school.refresh_from_db()
+    assert school.boundary is None
+    assert import_boundary_file(BOUNDARIES) == counts
+    school.refresh_from_db()
+    eagle.refresh_from_db()
+    # A plain Polygon is coerced, and the bow tie is repaired into two parts
+    assert school.boundary.geom_type == 'MultiPolygon'
+    assert len(school.boundary) == 1
+    assert eagle.boundary.geom_type == 'MultiPolygon'
+    assert eagle.boundary.valid
+    assert len(eagle.boundary) == 2
+    assert eagle.boundary_simple.geom_type == 'MultiPolygon'
+
+
+@pytest.mark.django_db
+def test_import_enrollment(school):
+    # Matched by location when the full name doesn't match
+    eagle = School.objects.create(
+        name='Eagle',
+        full='Eagle High School',
+        kind=School.KIND.high,
+        location_id=102,
+    )
+    School.objects.create(
+        name='Rocky Mountain',
+        full='Rocky Mountain High School',
+        kind=School.KIND.high,
+        enrollment=2100,
+        capacity=2200,
+    )
+    counts = {
+        'updated': 2,
+        'unchanged': 1,
+        'skipped': 2,
+    }
+    assert import_enrollment(ENROLLMENT, dry_run=True) == counts
+    school.refresh_from_db()
+    assert school.enrollment is None
+    assert import_enrollment(ENROLLMENT) == counts
+    school.refresh_from_db()
+    eagle.refresh_from_db()
+    assert (school.enrollment, school.capacity) == (1800, 2000)
+    assert (eagle.enrollment, eagle.capacity) == (1500, 1700)
+    assert import_enrollment(ENROLLMENT)['unchanged'] == 3
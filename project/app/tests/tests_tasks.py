@@ -0,0 +1,378 @@
+# Django
+# Third-Party
+import os
+from unittest.mock import patch
+
+import pytest
+from app.caches import get_version
+from app.factories import UserFactory
+from app.caches import incr_metric
+from app.caches import reconcile_metrics
+from app.geocoders import geocode_address
+from app.jobs import ModelRef
+from app.jobs import coalesce
+from app.jobs import dump
+from app.jobs import get_counts
+from app.jobs import load
+from app.letters import get_letter_starts
+from app.mailers import deliver
+from app.mailers import get_outbox_key
+from app.models import Account
+from app.models import Comment
+from app.models import Geocode
+from app.models import Outbox
+from app.models import School
+from app.models import Student
+from app.models import Zone
+from app.tasks import create_or_update_mailchimp_from_user
+from app.tasks import drain_outbox
+from app.tasks import geocode_account
+from app.tasks import geocode_accounts
+from app.tasks import refresh_density
+from app.tasks import rezone_accounts
+from app.tasks import send_approval_email
+from app.tasks import send_digests
+from app.tasks import send_mailing
+from app.tasks import send_mailing_batch
+from app.tasks import send_zone_campaign
+from app.tasks import update_cards_from_school
+from app.tasks import update_zoned_schools
+from django.contrib.gis.geos import MultiPolygon
+from django.contrib.gis.geos import Point
+from django.contrib.gis.geos import Polygon
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend
+
+GEOCODES = os.path.join(os.path.dirname(__file__), 'geocodes.json')
+
+
+class FlakyBackend(EmailBackend):
+    failures = 1
+
+    def send_messages(self, messages):
+        if FlakyBackend.failures:
+            FlakyBackend.failures -= 1
+            raise ConnectionError('Connection reset')
+        return super().send_messages(messages)
+
+
+@pytest.fixture
+def geocoder(settings):
+    settings.GEOCODER_BACKEND = 'app.geocoders.FileGeocoder'
+    settings.GEOCODER_FILE = GEOCODES
+    return settings
+
+@pytest.mark.django_db
+def test_geocode_cache(geocoder):
+    response = geocode_address('1303 E Central Dr, Meridian, ID 83642')
+    assert response['accuracy'] == 'ROOFTOP'
+    assert Geocode.objects.count() == 1
+    geocoder.GEOCODER_FILE = os.devnull
+    response = geocode_address('1303 e. central dr meridian id 83642')
+    assert response['accuracy'] == 'ROOFTOP'
+
+@pytest.mark.django_db
+def test_geocode_account(geocoder, user):
+    account = user.account
+    account.address = '1303 E Central Dr, Meridian, ID 83642'
+    geocode_account(account)
+    account = Account.objects.get(pk=account.pk)
+    assert account.is_precise
+    assert account.point.x == -116.3734
+
+@pytest.mark.django_db
+def test_geocode_account_imprecise(geocoder, user):
+    account = user.account
+    account.address = 'Meridian, ID'
+    account = geocode_account(account)
+    assert not account.is_precise
+    assert account.geocode['status'] == 'IMPRECISE'
+
+@pytest.mark.django_db
+def test_geocode_accounts(geocoder, user):
+    account = user.account
+    account.address = '1303 E Central Dr, Meridian, ID 83642'
+    account.save()
+    summary = geocode_accounts(rate=100, restart=True)
+    assert summary == {
+        'precise': 1,
+        'imprecise': 0,
+        'failed': 0,
+        'continued': False,
+    }
+    assert Account.objects.filter(point__isnull=False).count() == 1
+
+@pytest.mark.django_db
+def test_refresh_density(settings, user):
+    settings.DENSITY_MIN_COUNT = 2
+    account = user.account
+    account.point = Point(-116.3734, 43.6121)
+    account.save()
+    assert refresh_density() == {
+        'zones': 0,
+        'schools': 0,
+        'cells': 0,
+    }
+    settings.DENSITY_MIN_COUNT = 1
+    assert refresh_density()['cells'] == 1
+
+@pytest.mark.django_db
+def test_send_mailing(user):
+    summary = send_mailing(Account.objects.all(), 'emails/denied.txt', 'Subject')
+    assert summary['sent'] == 1
+    assert summary['failed'] == 0
+    assert mail.outbox[0].to == ['user@localhost']
+
+def test_deliver_retries(settings):
+    settings.EMAIL_BACKEND = 'app.tests.tests_tasks.FlakyBackend'
+    settings.MAILER_BACKOFF = 0
+    emails = [EmailMessage('Subject', 'Body', to=[f'{i}@localhost']) for i in range(3)]
+    sent, failed = deliver(emails)
+    assert len(sent) == 3
+    assert failed == []
+    assert len(mail.outbox) == 3
+
+@pytest.mark.django_db
+def test_send_zone_campaign(user):
+    account = user.account
+    account.zone = Zone.objects.create(name='Zone One', num=1)
+    account.save()
+    with patch.object(send_mailing_batch, 'delay') as delay:
+        assert send_zone_campaign(1, 'emails/denied.txt', 'Subject') == 1
+        assert send_zone_campaign(3, 'emails/denied.txt', 'Subject') == 0
+    delay.assert_called_once_with([str(account.id)], 'emails/denied.txt', 'Subject')
+    assert send_mailing_batch([str(account.id)], 'emails/denied.txt', 'Subject')['sent'] == 1
+    assert len(mail.outbox) == 1
+
+@pytest.mark.django_db
+def test_send_digests(issue, user):
+    issue.delivery = issue.DELIVERY.digest
+    issue.recipient_emails = ['board@localhost']
+    issue.save()
+    Comment.objects.create(
+        account=user.account,
+        issue=issue,
+        content='Comment',
+        state=Comment.STATE.approved,
+    )
+    assert send_digests() == {
+        'digests': 1,
+        'failed': 0,
+        'comments': 1,
+    }
+    assert send_digests()['digests'] == 0
+    assert len(mail.outbox) == 1
+
+@pytest.mark.django_db
+def test_outbox(issue, user):
+    comment = Comment.objects.create(
+        account=user.account,
+        issue=issue,
+        content='Comment',
+    )
+    send_approval_email(comment)
+    send_approval_email(comment)
+    assert Outbox.objects.count() == 1
+    assert drain_outbox() == {'sent': 1}
+    assert drain_outbox() == {}
+    assert Outbox.objects.get().state == Outbox.STATE.sent
+    assert len(mail.outbox) == 1
+
+@pytest.mark.django_db
+def test_comment_emails_on_commit(issue, user, django_capture_on_commit_callbacks):
+    comment = Comment(
+        account=user.account,
+        issue=issue,
+        content='Comment',
+    )
+    comment.approve()
+    with pytest.raises(ValueError):
+        send_approval_email(comment)
+    with django_capture_on_commit_callbacks(execute=True):
+        comment.save()
+    assert Outbox.objects.get().key == get_outbox_key(comment, user.email, 'emails/approved.txt')
+    with django_capture_on_commit_callbacks(execute=True):
+        comment.save()
+    assert Outbox.objects.count() == 1
+
+@pytest.mark.django_db
+def test_model_refs(user):
+    ref = dump(user)
+    assert ref == ModelRef('app.user', str(user.pk))
+    assert load(ref) == user
+    assert load('value') == 'value'
+
+@pytest.mark.django_db
+def test_coalesce(user):
+    assert coalesce(create_or_update_mailchimp_from_user, user, 60)
+    assert coalesce(create_or_update_mailchimp_from_user, user, 60) is None
+    counts = get_counts('app.tasks.create_or_update_mailchimp_from_user')
+    assert counts['enqueued'] == 1
+    assert counts['coalesced'] == 1
+
+@pytest.mark.django_db
+def test_user_save_skipped(user):
+    user.save()
+    counts = get_counts('app.tasks.create_or_update_mailchimp_from_user')
+    assert counts['skipped'] == 1
+
+@pytest.mark.django_db
+def test_update_cards_from_school(issue, user):
+    school = School.objects.create(
+        name='Meridian',
+        full='Meridian High School',
+        kind=School.KIND.high,
+    )
+    Student.objects.create(
+        account=user.account,
+        school=school,
+        grade=Student.GRADE.ninth,
+    )
+    comment = Comment.objects.create(
+        account=user.account,
+        issue=issue,
+        content='Comment',
+    )
+    school.name = 'Meridian Academy'
+    school.save()
+    update_cards_from_school(school)
+    comment.refresh_from_db()
+    assert comment.card['students'][0]['school'] == 'Meridian Academy'
+
+@pytest.mark.django_db
+def test_boundaries_bumped_on_commit(django_capture_on_commit_callbacks):
+    version = get_version('boundaries')
+    with django_capture_on_commit_callbacks(execute=True):
+        School.objects.create(
+            name='Meridian',
+            full='Meridian High School',
+            kind=School.KIND.high,
+        )
+    # Once in the transaction, again after it commits
+    assert get_version('boundaries') == version + 2
+
+@pytest.mark.django_db
+def test_member_count_spouse(user, django_capture_on_commit_callbacks):
+    user.account.delete()
+    reconcile_metrics()
+    with django_capture_on_commit_callbacks(execute=True):
+        account = Account.objects.create(
+            user=user,
+            name='User',
+            is_spouse=True,
+        )
+    assert cache.get('member_count') == 2
+    with django_capture_on_commit_callbacks(execute=True):
+        account.is_spouse = False
+        account.save()
+    assert cache.get('member_count') == 1
+    with django_capture_on_commit_callbacks(execute=True):
+        account.is_spouse = True
+        account.save()
+    assert cache.get('member_count') == 2
+    with django_capture_on_commit_callbacks(execute=True):
+        account.delete()
+    assert cache.get('member_count') == 0
+
+@pytest.mark.django_db
+def test_metric_missing_key(user, django_capture_on_commit_callbacks):
+    cache.delete('comment_count')
+    with django_capture_on_commit_callbacks(execute=True):
+        incr_metric('comment_count')
+    # The increment finds no key and rebuilds every counter from the rows
+    assert cache.get('comment_count') == Comment.objects.count()
+    assert cache.get('member_count') == 1
+
+@pytest.mark.django_db
+def test_geocode_failure_not_cached(geocoder, user):
+    account = user.account
+    account.address = '1 Nowhere Rd, Meridian, ID 83642'
+    account.save()
+    assert geocode_address(account.address) is None
+    assert Geocode.objects.count() == 0
+    geocode_account(account)
+    account = Account.objects.get(pk=account.pk)
+    assert account.geocode is None
+    assert geocode_accounts(rate=100, restart=True)['failed'] == 1
+
+def test_letter_starts(tmp_path):
+    outline = tmp_path / 'outline.xml'
+    outline.write_text(
+        '<outline xmlns="http://wkhtmltopdf.org/outline">'
+        '<item title="" page="0">'
+        '<item title="Letter from A" page="0"><item title="Dear" page="0"/></item>'
+        '<item title="Letter from B" page="1"/>'
+        '<item title="Letter from C" page="3"/>'
+        '</item>'
+        '</outline>'
+    )
+    assert get_letter_starts(outline) == [1, 2, 4]
+    assert get_letter_starts(tmp_path / 'missing.xml') == []
+
+@pytest.mark.django_db
+def test_rezone_accounts():
+    one = Zone.objects.create(
+        name='Zone One',
+        num=1,
+        poly=Polygon.from_bbox((-116.40, 43.60, -116.38, 43.62)),
+    )
+    two = Zone.objects.create(
+        name='Zone Two',
+        num=2,
+        poly=Polygon.from_bbox((-116.38, 43.60, -116.36, 43.62)),
+    )
+    fallback = Zone.objects.create(
+        name='Not in District',
+        num=0,
+    )
+    accounts = [UserFactory().account for _ in range(4)]
+    points = [
+        Point(-116.39, 43.61),
+        Point(-116.37, 43.61),
+        Point(-116.00, 43.00),
+        None,
+    ]
+    for account, point, zone in zip(accounts, points, [None, two, None, None]):
+        # Queryset updates skip the signals that would zone them already
+        Account.objects.filter(pk=account.pk).update(point=point, zone=zone)
+    moved, stayed, outside, unpointed = accounts
+    expected = [
+        (str(moved.pk), None, str(one.pk)),
+        (str(outside.pk), None, str(fallback.pk)),
+    ]
+    assert sorted(rezone_accounts(dry_run=True)) == sorted(expected)
+    assert not Account.objects.exclude(zone=None).exclude(pk=stayed.pk).exists()
+    updated = Account.objects.get(pk=stayed.pk).updated
+    assert sorted(rezone_accounts()) == sorted(expected)
+    zones = dict(Account.objects.values_list('id', 'zone'))
+    assert zones[moved.pk] == one.pk
+    assert zones[stayed.pk] == two.pk
+    assert zones[outside.pk] == fallback.pk
+    assert zones[unpointed.pk] is None
+    assert Account.objects.get(pk=stayed.pk).updated == updated
+    assert rezone_accounts() == []
+
+@pytest.mark.django_db
+def test_update_zoned_schools(user):
+    inside = School.objects.create(
+        name='Meridian',
+        full='Meridian Middle School',
+        kind=School.KIND.middle,
+        is_traditional=True,
+        boundary=MultiPolygon(Polygon.from_bbox((-116.40, 43.60, -116.38, 43.62))),
+    )
+    School.objects.create(
+        name='Eagle',
+        full='Eagle Middle School',
+        kind=School.KIND.middle,
+        is_traditional=True,
+        boundary=MultiPolygon(Polygon.from_bbox((-116.38, 43.60, -116.36, 43.62))),
+    )
+    Account.objects.filter(pk=user.account.pk).update(point=Point(-116.39, 43.61))
+    assert update_zoned_schools() == 1
+    assert list(user.account.zoned_schools.all()) == [inside]
+    # Re-tagging replaces the rows rather than adding to them
+    assert update_zoned_schools() == 1
+    assert user.account.zoned_schools.count() == 1
@@ -1,6 +1,11 @@
 # Django
 # Third-Party
 import pytest
+from app.models import Account
+from app.models import School
+from django.contrib.gis.geos import MultiPolygon
+from django.contrib.gis.geos import Point
+from django.contrib.gis.geos import Polygon
 from django.urls import reverse
 
 
@@ -31,3 +36,35 @@ def test_dashboard(user_client, issue):
     path = reverse('dashboard')
     response = user_client.get(path)
     assert response.status_code == 200
+
+@pytest.mark.django_db
+def test_zoned_schools(user_client):
+    path = reverse('zoned-schools')
+    response = user_client.get(path)
+    assert response.status_code == 200
+    assert response.json() == {
+        'elementary': None,
+        'middle': None,
+        'high': None,
+    }
+
+@pytest.mark.django_db
+def test_zoned_schools_inside_boundary(user_client):
+    Account.objects.filter(user__username='user').update(point=Point(-116.39, 43.61))
+    school = School.objects.create(
+        name='Meridian',
+        full='Meridian Elementary School',
+        kind=School.KIND.elementary,
+        is_traditional=True,
+        boundary=MultiPolygon(Polygon.from_bbox((-116.40, 43.60, -116.38, 43.62))),
+    )
+    path = reverse('zoned-schools')
+    response = user_client.get(path)
+    assert response.json() == {
+        'elementary': {
+            'id': str(school.id),
+            'name': 'Meridian',
+        },
+        'middle': None,
+        'high': None,
+    }
@@ -9,6 +9,7 @@ from . import views
 urlpatterns = [
     # Root
     path('', views.index, name='index',),
+    path('comments/more', views.comments_more, name='comments-more',),
 
     # Authentication
     path('callback', views.callback, name='callback'),
@@ -24,6 +25,7 @@ urlpatterns = [
     path('account', views.account, name='account',),
     path('upload-picture', views.upload_picture, name='upload-picture',),
     path('delete-picture', views.delete_picture, name='delete-picture',),
+    path('zoned-schools', views.zoned_schools, name='zoned-schools',),
     path('delete', views.delete, name='delete',),
 
     # Voter
@@ -37,6 +39,9 @@ urlpatterns = [
 
     # Resources
     path('updates', views.updates, name='updates',),
+    path('schools/<str:kind>.geojson', views.boundaries, name='boundaries',),
+    path('density', views.density, name='density',),
+    path('packets/<str:job_id>', views.packet, name='packet',),
     path('board', TemplateView.as_view(template_name='pages/board/index.html'), name='board',),
 
     # Footer
@@ -2,6 +2,7 @@ import datetime
 import json
 import logging
 
+import django_rq
 import jwt
 import requests
 from django.conf import settings
@@ -11,23 +12,37 @@ from django.contrib.auth import login as log_in
 from django.contrib.auth import logout as log_out
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import PermissionDenied
+from django.http import Http404
 from django.http import HttpResponse
+from django.http import HttpResponseNotModified
+from django.http import JsonResponse
 from django.shortcuts import redirect
 from django.shortcuts import render
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.utils.cache import patch_vary_headers
 from django.utils.crypto import get_random_string
 from django.utils.safestring import mark_safe
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from django_fsm import TransitionNotAllowed
 
+from .caches import get_active_issue
+from .caches import get_boundaries
+from .caches import get_density
+from .caches import get_version
 from .forms import AccountForm
 from .forms import CommentForm
 from .forms import ConfirmForm
 from .forms import SearchForm
 from .forms import StudentFormSet
+from .exporters import get_level
 from .models import Comment
-from .models import Issue
+from .letters import get_packet_storage
+from .paginators import KeysetPage
+from .paginators import decode_cursor
+from .resolvers import get_zoned_schools
 from .tasks import get_mailchimp_client
 from .tasks import link_account
 from .tasks import send_verification_email
@@ -38,25 +53,10 @@ log = logging.getLogger(__name__)
 
 # Root
 def index(request):
-    try:
-        issue = Issue.objects.get(
-            state=Issue.STATE.active,
-        )
-    except Issue.DoesNotExist:
-        issue = None
-    comments = Comment.objects.filter(
-        account__is_public=True,
-        state=Comment.STATE.approved,
-        account__user__is_active=True,
-        issue=issue,
-    ).select_related(
-        'account',
-        'account__user',
-    ).prefetch_related(
-        'account__students',
-        'account__students__school',
-    ).order_by(
-        '-created',
+    issue = get_active_issue()
+    comments = KeysetPage(
+        Comment.objects.wall(issue),
+        size=settings.COMMENTS_PAGE_SIZE,
     )
     return render(
         request,
@@ -64,9 +64,62 @@ def index(request):
         context = {
             'comments': comments,
             'issue': issue,
+            'version': get_version('comments'),
         },
     )
 
+def comments_more(request):
+    issue = get_active_issue()
+    cursor = request.GET.get('cursor', None)
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            return HttpResponse(status=400)
+    comments = KeysetPage(
+        Comment.objects.wall(issue),
+        cursor=cursor,
+        size=settings.COMMENTS_PAGE_SIZE,
+    )
+    html = render_to_string(
+        'pages/comment_rows.html',
+        context={
+            'comments': comments,
+        },
+        request=request,
+    )
+    return JsonResponse({
+        'html': html,
+        'cursor': comments.next_cursor,
+    })
+
+def boundaries(request, kind):
+    if kind not in ['elementary', 'middle', 'high']:
+        raise Http404
+    level = get_level(request.GET.get('zoom', None))
+    payload = get_boundaries(kind, level)
+    etag = f'W/"{payload["etag"]}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        accept = request.headers.get('Accept-Encoding', '')
+        if 'br' in accept:
+            encoding = 'br'
+        elif 'gzip' in accept:
+            encoding = 'gzip'
+        else:
+            encoding = None
+        response = HttpResponse(
+            payload[encoding or 'identity'],
+            content_type='application/geo+json',
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    patch_vary_headers(response, ['Accept-Encoding'])
+    patch_cache_control(response, public=True, max_age=3600)
+    return response
+
 # Authentication
 def login(request):
     redirect_uri = request.build_absolute_uri(reverse('callback'))
@@ -210,12 +263,7 @@ def dashboard(request):
     comments = account.comments.order_by(
         '-created',
     )
-    try:
-        issue = Issue.objects.get(
-            state=Issue.STATE.active,
-        )
-    except Issue.DoesNotExist:
-        issue = None
+    issue = get_active_issue()
     is_current = comments.filter(
         issue=issue,
     )
@@ -233,18 +281,13 @@ def dashboard(request):
 # Account
 @login_required
 def account(request):
-    try:
-        issue = Issue.objects.get(
-            state=Issue.STATE.active,
-        )
-    except Issue.DoesNotExist:
-        issue = None
+    issue = get_active_issue()
     account = request.user.account
     students = account.students.order_by(
         'grade',
     )
     comments = account.comments.filter(
-        issue__state=10,
+        issue=issue,
     ).count()
     if request.POST:
         form = AccountForm(request.POST, instance=account)
@@ -295,6 +338,41 @@ def account(request):
         },
     )
 
+@login_required
+def zoned_schools(request):
+    account = request.user.account
+    zoned = get_zoned_schools(account.point)
+    return JsonResponse({
+        kind: {
+            'id': str(school.id),
+            'name': school.name,
+        } if school else None for kind, school in zoned.items()
+    })
+
+@login_required
+def density(request):
+    if not request.user.is_admin:
+        raise PermissionDenied
+    return JsonResponse(get_density())
+
+@login_required
+def packet(request, job_id):
+    if not request.user.is_admin:
+        raise PermissionDenied
+    job = django_rq.get_queue('default').fetch_job(job_id)
+    if job is None:
+        raise Http404
+    status = job.get_status()
+    url = get_packet_storage().url(job.result) if status == 'finished' else None
+    if url and 'download' in request.GET:
+        return redirect(url)
+    return JsonResponse({
+        'status': status,
+        'done': job.meta.get('done', 0),
+        'total': job.meta.get('total'),
+        'url': url,
+    })
+
 @login_required
 def delete(request):
     if request.method == "POST":
@@ -318,12 +396,7 @@ def delete(request):
 @login_required
 def comments(request):
     account = request.user.account
-    try:
-        issue = Issue.objects.get(
-            state=Issue.STATE.active,
-        )
-    except Issue.DoesNotExist:
-        issue = None
+    issue = get_active_issue()
     comment = account.comments.filter(issue=issue).first()
     if request.method == 'POST':
         form = CommentForm(request.POST, instance=comment)
@@ -352,20 +425,9 @@ def comments(request):
             return redirect('comments')
     else:
         form = CommentForm(instance=comment)
-    comments = Comment.objects.filter(
-        account__is_public=True,
-        state=Comment.STATE.approved,
-        account__user__is_active=True,
-        issue=issue,
-    ).select_related(
-        'account',
-        'account__user',
-    ).prefetch_related(
-        'account__students',
-        'account__students__school',
-    ).order_by(
-        # '-is_featured',
-        '-created',
+    comments = KeysetPage(
+        Comment.objects.wall(issue),
+        size=settings.COMMENTS_PAGE_SIZE,
     )
     return render(
         request,
@@ -11,7 +11,9 @@ env = Env(
     TIME_ZONE=(str, 'US/Mountain'),
     EMAIL_URL=(str, 'smtp://localhost:1025'),
     REDIS_URL=(str, 'redis://localhost:6379/0'),
+    TEST_REDIS_URL=(str, 'redis://localhost:6379/1'),
     LOGLEVEL=(str, 'INFO'),
+    LETTERS_CACHE_DIR=(str, '/tmp/letters'),
 )
 
 root = Path(__file__) - 2
@@ -57,6 +59,7 @@ AUTH0_TENANT = env("AUTH0_TENANT")
 # Mailchimp
 MAILCHIMP_API_KEY = env("MAILCHIMP_API_KEY")
 MAILCHIMP_AUDIENCE_ID = env("MAILCHIMP_AUDIENCE_ID")
+MAILCHIMP_SYNC_DELAY = 60
 
 # Database
 DATABASES = {
@@ -93,6 +96,29 @@ RQ_QUEUES = {
 }
 RQ_SHOW_ADMIN_LINK = True
 
+# Tests flush this database, so keep it apart from the queues and sessions
+TEST_REDIS_URL = env("TEST_REDIS_URL")
+
+# Comments
+COMMENTS_PAGE_SIZE = 50
+
+# Issues
+ACTIVE_ISSUE_TIMEOUT = 60
+ACTIVE_ISSUE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Metrics
+METRICS_TIMEOUT = 10
+
+# Boundaries
+BOUNDARY_SIMPLIFY_TOLERANCE = 0.0001
+BOUNDARIES_TIMEOUT = 60 * 60 * 24 * 7
+ZONED_SCHOOLS_DELAY = 60 * 5
+
+# Density
+DENSITY_CELL_SIZE = 0.01
+DENSITY_MIN_COUNT = 5
+DENSITY_TIMEOUT = 60 * 60 * 24
+
 # Sessions
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 SESSION_CACHE_ALIAS = "default"
@@ -103,6 +129,23 @@ DEFAULT_FROM_EMAIL = env("DEFAULT_FROM_EMAIL")
 EMAIL_CONFIG = env.email_url('EMAIL_URL')
 vars().update(EMAIL_CONFIG)
 
+# Mailers
+MAILER_BATCH_SIZE = 100
+MAILER_RETRIES = 2
+MAILER_BACKOFF = 5
+DIGESTS_LOCK_TIMEOUT = 60 * 30
+OUTBOX_MAX_ATTEMPTS = 5
+
+# Letters
+LETTERS_CHUNK_SIZE = 50
+LETTERS_WORKERS = None
+LETTERS_CACHE_DIR = env("LETTERS_CACHE_DIR")
+LETTERS_CACHE_SIZE = 512 * 1024 * 1024
+PACKETS_TIMEOUT = 60 * 60
+# The packet view finds the file through the job result, so keep it for days
+PACKETS_RESULT_TTL = 60 * 60 * 24 * 30
+PACKETS_PROGRESS_STEP = 25
+
 # Static File Management
 STATIC_ROOT = root('staticfiles')
 STATIC_URL = '/static/'
@@ -119,6 +162,13 @@ CLOUDINARY_NAME = CLOUDINARY_URL.rpartition("@")[2]
 # Google
 GOOGLE_API_KEY = env("GOOGLE_API_KEY")
 
+# Geocoding
+GEOCODER_BACKEND = 'app.geocoders.GoogleGeocoder'
+GEOCODER_FILE = None
+GEOCODE_CACHE_TTL = 60 * 60 * 24 * 365
+GEOCODE_JOB_BUDGET = 60 * 10
+GEOCODE_JOB_TIMEOUT = 60 * 15
+
 # Facebook
 FACEBOOK_CLIENT_ID = env("FACEBOOK_CLIENT_ID")
 